@@ -5,6 +5,10 @@ rooms_sync_google.py
 Optional:
 - --split-by standort / gebaeude
 - --no-chunk um Tages-Splitting 06-22 abzuschalten
+- --prefer-grid um den CSV-Export zu ueberspringen (nur Grid-Scraping)
+- --debug startet den Browser sichtbar (sonst headless)
+- --debug-artifacts schreibt den HTML-Dump nach der Suche (after_find.html)
+- --daemon haelt den Browser offen; jede Verbindung auf 127.0.0.1:--port startet einen Lauf
 Zusaetzlich: HTML-Tafel (artifacts_sync/schedule.html)
 
 Start (PowerShell):
@@ -15,15 +19,22 @@ Start (PowerShell):
 
 import argparse
 import asyncio
+import codecs
+import csv
+import functools
 import hashlib
 import json
 import os
 import re
+import shutil
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 from pathlib import Path
-from typing import List, Tuple, Optional, Dict
+from typing import Awaitable, Callable, List, Tuple, Optional, Dict, Set
 
+import numpy as np
 import pandas as pd
 from dateutil import tz
 from playwright.async_api import (
@@ -36,8 +47,11 @@ from playwright.async_api import (
 # Google
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 
 # ------------------ Konfiguration ------------------
 BASE = "https://bfh.book.3vrooms.app"
@@ -48,17 +62,31 @@ USER_DATA_DIR = SCRIPT_DIR / "pw_profile"  # persistentes Profil (kein staendige
 ARTIFACTS_DIR = SCRIPT_DIR / "artifacts_sync"
 ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
 
-ROOMS_CSV_PATTERN = re.compile(
-    r"(export[_-]?reservation|reservation[_-]?export|reservation)", re.I
-)
+# Export-Dateien heissen export_reservation*, reservation-export* usw.;
+# alle Varianten enthalten "reservation" -> einfacher Teilstring-Test genuegt
+ROOMS_CSV_MARKER = "reservation"
 LOCAL_TZ = tz.gettz("Europe/Zurich")
+GRID_READY_SELECTOR = "#contentgrid, form[action*='Find']"
+# Schriften/Medien per URL-Muster (CDP), damit kein Request durch Python laufen muss
+BLOCKED_URL_PATTERNS = [
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.ogg", "*.mp3", "*.wav",
+]
 SCOPES = ["https://www.googleapis.com/auth/calendar"]
+CALENDAR_CACHE_PATH = SCRIPT_DIR / "calendar_cache.json"
+CALENDAR_CACHE_TTL_SECS = 24 * 3600
+GCAL_BATCH_SIZE = 50  # Obergrenze von Google pro Batch-Request
+GCAL_BATCH_RETRIES = 4
+GCAL_SYNC_WORKERS = 8  # parallele Buckets, schont das QPS-Limit pro Nutzer
+DAEMON_PORT = 8765
 SOURCE_TAG = "bfh-rooms-sync"
 
 # ------------------ Zeitraum ------------------
 
 
+@functools.lru_cache(maxsize=1)
 def compute_window_days_7() -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """Fenster heute 00:00 bis +7 Tage 23:59:59; pro Lauf einmal berechnet (reset_window)."""
     today = pd.Timestamp(date.today(), tz=LOCAL_TZ)
     start = today.replace(hour=0, minute=0, second=0, microsecond=0)
     end = (today + pd.Timedelta(days=7)).replace(
@@ -67,24 +95,140 @@ def compute_window_days_7() -> Tuple[pd.Timestamp, pd.Timestamp]:
     return start, end
 
 
+@functools.lru_cache(maxsize=1)
+def window_days() -> Tuple[pd.Timestamp, ...]:
+    start, _ = compute_window_days_7()
+    return tuple(start + pd.Timedelta(days=i) for i in range(7))
+
+
+def reset_window() -> None:
+    """Vergisst das gemerkte Fenster, damit der naechste Lauf das aktuelle Datum nimmt."""
+    compute_window_days_7.cache_clear()
+    window_days.cache_clear()
+
+
 # ------------------ CSV robust laden ------------------
 
 
+CSV_SNIFF_BYTES = 64 * 1024
+
+
+def _sniff_encoding(path: Path) -> Optional[str]:
+    """Encoding aus den ersten 64 KB: BOM, sonst UTF-8-Probe, sonst cp1252."""
+    try:
+        with open(path, "rb") as fh:
+            sample = fh.read(CSV_SNIFF_BYTES)
+    except OSError:
+        return None
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        # inkrementell, damit ein am Probenende abgeschnittenes Zeichen nicht stoert
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+def _sniff_sep(path: Path, encoding: str) -> Optional[str]:
+    """Trennzeichen aus der Kopfzeile (haeufigstes von ; , Tab |), None wenn keins vorkommt."""
+    try:
+        with open(path, encoding=encoding, errors="replace") as fh:
+            head = fh.read(4096)
+    except (OSError, UnicodeError, LookupError):
+        return None
+    # nur die erste Zeile: Datumswerte wie "Mo, 16.10." verfaelschen sonst die Kommas
+    first = next((ln for ln in head.splitlines() if ln.strip()), "")
+    counts = {sep: first.count(sep) for sep in (";", ",", "\t", "|")}
+    sep = max(counts, key=counts.get)
+    return sep if counts[sep] else None
+
+
+def _read_csv_arrow(
+    path: Path, encoding: str, sep: str, header: bool
+) -> Optional[pd.DataFrame]:
+    """Mehrthreadiger Parser von pyarrow (optional). None = nicht installiert/nicht lesbar."""
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pv
+    except ImportError:
+        return None
+    try:
+        with open(path, encoding=encoding, newline="") as fh:
+            first = next(csv.reader([fh.readline()], delimiter=sep), [])
+        if not first:
+            return None
+        # alle Spalten als Text (wie dtype=str); Typ-Inferenz wuerde z.B. "007" zu 7 machen
+        names = [f"f{i}" for i in range(len(first))]
+        tbl = pv.read_csv(
+            path,
+            read_options=pv.ReadOptions(
+                encoding=encoding, column_names=names, skip_rows=1 if header else 0
+            ),
+            parse_options=pv.ParseOptions(delimiter=sep),
+            convert_options=pv.ConvertOptions(
+                column_types={n: pa.string() for n in names},
+                strings_can_be_null=True,
+                null_values=[""],
+            ),
+        )
+    except (pa.ArrowInvalid, OSError, UnicodeError, ValueError):
+        return None
+    df = tbl.to_pandas()
+    if header:
+        # doppelte Namen wie pandas entschaerfen: "Name", "Name.1", ...
+        seen: Dict[str, int] = {}
+        cols = []
+        for c in first:
+            n = seen.get(c, 0)
+            seen[c] = n + 1
+            cols.append(f"{c}.{n}" if n else c)
+        df.columns = cols
+    else:
+        df.columns = range(len(names))
+    return df
+
+
 def read_csv_smart(path: Path) -> pd.DataFrame:
+    """Liest eine Export-CSV; dieselbe Datei (Pfad, mtime, Groesse) wird nur einmal geparst."""
+    st = path.stat()
+    # Kopie: Aufrufer duerfen das Ergebnis veraendern, ohne den Cache zu beschaedigen
+    return _read_csv_cached(str(path), st.st_mtime_ns, st.st_size).copy()
+
+
+@functools.lru_cache(maxsize=4)
+def _read_csv_cached(path_str: str, mtime_ns: int, size: int) -> pd.DataFrame:
+    return _read_csv_uncached(Path(path_str))
+
+
+def _read_csv_uncached(path: Path) -> pd.DataFrame:
     encodings = ["utf-8-sig", "utf-16", "utf-16-le", "cp1252", "latin1"]
+    sniffed = _sniff_encoding(path)
+    if sniffed:
+        # erkanntes Encoding zuerst, der Rest bleibt als Fallback
+        encodings = [sniffed] + [e for e in encodings if e != sniffed]
     for enc in encodings:
+        sep = _sniff_sep(path, enc)
         for header in [True, False]:
+            hdr = 0 if header else None
             try:
-                if header:
-                    df = pd.read_csv(path, sep=None, engine="python", encoding=enc)
-                else:
+                df = _read_csv_arrow(path, enc, sep, header) if sep else None
+                if sep and df is None:
+                    # C-Engine mit bekanntem Trenner; alles als Text, typisiert wird spaeter
+                    try:
+                        df = pd.read_csv(
+                            path, sep=sep, encoding=enc, header=hdr, dtype=str
+                        )
+                    except pd.errors.ParserError:
+                        df = None
+                if df is None:
                     df = pd.read_csv(
-                        path, sep=None, engine="python", encoding=enc, header=None
+                        path, sep=None, engine="python", encoding=enc, header=hdr
                     )
                 if df.shape[1] <= 1:
-                    df = pd.read_csv(
-                        path, sep=";", encoding=enc, header=(0 if header else None)
-                    )
+                    df = pd.read_csv(path, sep=";", encoding=enc, header=hdr)
                 return df
             except Exception:
                 pass
@@ -115,18 +259,61 @@ def extract_room_code(raum: str) -> str:
     return tokens[0]
 
 
+# Gleiche Regel wie extract_room_code, als eine Regex fuer Series.str.extract:
+# Gruppe 1 = erstes Token mit Ziffer; sonst Gruppe 2 (+ Gruppe 3, falls Token 2 eine Ziffer hat)
+RAUMCODE_RE = re.compile(r"^\s*(?:(\S*\d\S*)|(\S+)(?:\s+(\S*\d\S*))?)")
+
+
+def extract_room_codes(raum: pd.Series) -> pd.Series:
+    """Vektorisierte Variante von extract_room_code fuer eine ganze Spalte."""
+    m = raum.astype(str).str.extract(RAUMCODE_RE).fillna("")
+    pair = (m[1] + " " + m[2]).str.strip()
+    return m[0].where(m[0] != "", pair)
+
+
+# einmal kompiliert statt pro Aufruf/Zelle
+_NBSP = str.maketrans({"\u00A0": " ", "\u202F": " "})
+DT_FORMAT = "%d.%m.%Y %H:%M"
+_WEEKDAY_RE = re.compile(r"^[A-Za-zÄÖÜäöüß]+\s*,\s*")
+_WS_RE = re.compile(r"\s+")
+_ROOM_PAT = re.compile(
+    r"(?:^|\b)(?:[A-ZÄÖÜ]{1,3}\s?\d{1,4}|\d{2,4}|[A-ZÄÖÜ]{1,2}\d{2,4})(?:\b|\s)"
+)
+_ADDR_PAT = re.compile(
+    r"(?:strasse|str\.|platz|gasse|weg|allee|quai|ring|stras|platz)\b", re.I
+)
+
+
+def _parse_dt_series(series: pd.Series) -> pd.Series:
+    """Bereinigt Datumstexte spaltenweise (Wochentag, 'Uhr', NBSP) und parst in einem Aufruf."""
+    s = series.astype(str).str.translate(_NBSP)
+    s = s.str.replace(_WEEKDAY_RE, "", regex=True)
+    s = s.str.replace(" Uhr", "", regex=False).str.replace(",", " ", regex=False)
+    s = s.str.replace(_WS_RE, " ", regex=True).str.strip()
+    # Regelfall der BFH-Tabelle zuerst mit festem Format (schneller Pfad in pandas)
+    out = pd.to_datetime(s, format=DT_FORMAT, errors="coerce", cache=True)
+    rest = out.isna() & (s != "")
+    if not rest.any():
+        return out
+    # nur die Abweichler (ISO, Sekunden, ohne Uhrzeit ...) gehen durch den langsamen Parser
+    try:
+        other = pd.to_datetime(s[rest], dayfirst=True, errors="coerce", format="mixed")
+    except (ValueError, TypeError):
+        return out
+    if rest.all():
+        return other
+    if other.dt.tz is None:
+        out[rest] = other
+    return out
+
+
 def _guess_cols_by_content(
     df: pd.DataFrame,
 ) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
     sample = df.head(80).copy()
 
-    def try_parse_dt(x):
-        s = str(x).strip().replace(",", " ")
-        s = re.sub(r"^[A-Za-zäöüÄÖÜß]+,\s*", "", s)
-        return pd.to_datetime(s, dayfirst=True, errors="coerce")
-
     dt_scores = {
-        c: sample[c].apply(try_parse_dt).notna().mean() for c in sample.columns
+        c: _parse_dt_series(sample[c]).notna().mean() for c in sample.columns
     }
     dt_sorted = [
         c
@@ -136,12 +323,9 @@ def _guess_cols_by_content(
     col_von = dt_sorted[0] if len(dt_sorted) >= 1 else None
     col_bis = dt_sorted[1] if len(dt_sorted) >= 2 else None
 
-    room_pat = re.compile(
-        r"(^|\b)([A-ZÄÖÜ]{1,3}\s?\d{1,4}|\d{2,4}|[A-ZÄÖÜ]{1,2}\d{2,4})(\b|\s)"
-    )
+    texts = {c: sample[c].astype(str) for c in sample.columns}
     room_scores = {
-        c: sample[c].astype(str).apply(lambda s: bool(room_pat.search(s))).mean()
-        for c in sample.columns
+        c: t.str.contains(_ROOM_PAT, na=False).mean() for c, t in texts.items()
     }
     cand_room = [
         c
@@ -158,15 +342,12 @@ def _guess_cols_by_content(
         )
     )
 
-    addr_pat = re.compile(
-        r"(strasse|str\.|platz|gasse|weg|allee|quai|ring|stras|platz)\b", re.I
-    )
     site_scores = {
-        c: sample[c]
-        .astype(str)
-        .apply(lambda s: (" - " in s) or bool(addr_pat.search(s)))
-        .mean()
-        for c in sample.columns
+        c: (
+            t.str.contains(" - ", regex=False, na=False)
+            | t.str.contains(_ADDR_PAT, na=False)
+        ).mean()
+        for c, t in texts.items()
     }
     cand_site = [
         c
@@ -177,6 +358,36 @@ def _guess_cols_by_content(
     return col_von, col_bis, col_raum, col_site
 
 
+# Spaltenrollen -> Teilstrings im Spaltennamen, vorne = hoehere Prioritaet
+ROLE_KEYS: Dict[str, List[str]] = {
+    "von": ["von", "beginn", "start"],
+    "bis": ["bis", "ende", "end"],
+    "raum": [
+        "ressource bezeichnung",
+        "ressourcen id/bezeichnung",
+        "raum",
+        "ressource",
+        "resource",
+    ],
+    "site": ["standortbezeichnung", "standort", "adresse", "strasse"],
+}
+
+
+def _match_role_columns(columns) -> Dict[str, Optional[str]]:
+    """Ordnet alle Rollen in einem Durchgang ueber die Spalten zu.
+
+    Pro Rolle gewinnt der frueheste Schluessel, bei Gleichstand die erste Spalte.
+    """
+    lower = {str(c).lower(): c for c in columns}
+    best: Dict[str, Tuple[int, str]] = {}
+    for lc, orig in lower.items():
+        for role, keys in ROLE_KEYS.items():
+            rank = next((i for i, k in enumerate(keys) if k in lc), None)
+            if rank is not None and (role not in best or rank < best[role][0]):
+                best[role] = (rank, orig)
+    return {role: best[role][1] if role in best else None for role in ROLE_KEYS}
+
+
 def normalize_to_room_times(df: pd.DataFrame) -> pd.DataFrame:
     cols = list(df.columns)
     if not all(isinstance(c, str) for c in cols):
@@ -184,37 +395,11 @@ def normalize_to_room_times(df: pd.DataFrame) -> pd.DataFrame:
         df.columns = [f"col{i}" for i in range(len(cols))]
         cols = list(df.columns)
 
-    def try_parse_dt(x):
-        s = str(x).strip().replace(",", " ")
-        s = re.sub(r"^[A-Za-zäöüÄÖÜß]+,\s*", "", s)
-        return pd.to_datetime(s, dayfirst=True, errors="coerce")
-
-    lower = {str(c).lower(): c for c in df.columns}
-
-    def find_col(keys):
-        for key in keys:
-            for lc, orig in lower.items():
-                if key in lc:
-                    return orig
-        return None
-
-    col_von = find_col(["von", "beginn", "start"]) or None
-    col_bis = find_col(["bis", "ende", "end"]) or None
-    col_raum = (
-        find_col(
-            [
-                "ressource bezeichnung",
-                "ressourcen id/bezeichnung",
-                "raum",
-                "ressource",
-                "resource",
-            ]
-        )
-        or None
-    )
-    col_site = (
-        find_col(["standortbezeichnung", "standort", "adresse", "strasse"]) or None
-    )
+    roles = _match_role_columns(df.columns)
+    col_von = roles["von"]
+    col_bis = roles["bis"]
+    col_raum = roles["raum"]
+    col_site = roles["site"]
 
     if not (col_von and col_bis and col_raum):
         gv, gb, gr, gs = _guess_cols_by_content(df)
@@ -237,8 +422,8 @@ def normalize_to_room_times(df: pd.DataFrame) -> pd.DataFrame:
 
     out = pd.DataFrame(
         {
-            "Von": df[col_von].apply(try_parse_dt),
-            "Bis": df[col_bis].apply(try_parse_dt),
+            "Von": _parse_dt_series(df[col_von]),
+            "Bis": _parse_dt_series(df[col_bis]),
             "Raum": df[col_raum].astype(str),
             "Standort": df[col_site].astype(str) if col_site else "",
         }
@@ -249,21 +434,26 @@ def normalize_to_room_times(df: pd.DataFrame) -> pd.DataFrame:
     if out.empty:
         return out
 
-    out["Von"] = out["Von"].apply(
-        lambda x: (
-            x.tz_localize(LOCAL_TZ) if x.tzinfo is None else x.tz_convert(LOCAL_TZ)
-        )
-    )
-    out["Bis"] = out["Bis"].apply(
-        lambda x: (
-            x.tz_localize(LOCAL_TZ) if x.tzinfo is None else x.tz_convert(LOCAL_TZ)
-        )
-    )
+    for c in ("Von", "Bis"):
+        if out[c].dt.tz is None:
+            # mehrdeutige Herbst-Stunde -> NaT (faellt unten raus), Fruehlingsluecke -> vorwaerts
+            out[c] = out[c].dt.tz_localize(
+                LOCAL_TZ, ambiguous="NaT", nonexistent="shift_forward"
+            )
+        else:
+            out[c] = out[c].dt.tz_convert(LOCAL_TZ)
+    out = out[pd.notna(out["Von"]) & pd.notna(out["Bis"])]
+    if out.empty:
+        return out
 
     start, end = compute_window_days_7()
-    out = out[(out["Von"] <= end) & (out["Bis"] >= start)].copy()
-    out["Raumcode"] = out["Raum"].apply(extract_room_code)
     out = out.sort_values(["Von", "Raum"]).reset_index(drop=True)
+    # nach Von sortiert: Obergrenze per Binaersuche statt Vollvergleich
+    hi = np.searchsorted(out["Von"].values, end.to_datetime64(), side="right")
+    out = out.iloc[:hi]
+    out = out[out["Bis"] >= start].copy()
+    out["Raumcode"] = extract_room_codes(out["Raum"])
+    out = out.reset_index(drop=True)
     return out
 
 
@@ -272,37 +462,74 @@ def chunk_to_days_6_22(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df
     start, end = compute_window_days_7()
-    rows = []
-    for _, r in df.iterrows():
-        st = max(r["Von"], start)
-        en = min(r["Bis"], end)
-        if en <= st:
-            continue
-        cur_day = pd.Timestamp(st.year, st.month, st.day, 0, 0, 0, tzinfo=LOCAL_TZ)
-        last_day = pd.Timestamp(en.year, en.month, en.day, 0, 0, 0, tzinfo=LOCAL_TZ)
-        while cur_day <= last_day:
-            d_start = pd.Timestamp(
-                cur_day.year, cur_day.month, cur_day.day, 6, 0, 0, tzinfo=LOCAL_TZ
-            )
-            d_end = pd.Timestamp(
-                cur_day.year, cur_day.month, cur_day.day, 22, 0, 0, tzinfo=LOCAL_TZ
-            )
-            s = max(st, d_start)
-            e = min(en, d_end)
-            if e > s:
-                nr = r.copy()
-                nr["Von"] = s
-                nr["Bis"] = e
-                rows.append(nr)
-            cur_day = cur_day + pd.Timedelta(days=1)
-    if not rows:
+    parts = []
+
+    # Eintaegige Buchungen (der Normalfall) vektorisiert auf 06-22 zuschneiden
+    same_day = df["Von"].dt.date == df["Bis"].dt.date
+    if same_day.any():
+        sd = df[same_day].copy()
+        local_day = sd["Von"].dt.tz_localize(None).dt.normalize()
+        d_start = (local_day + pd.Timedelta(hours=6)).dt.tz_localize(LOCAL_TZ)
+        d_end = (local_day + pd.Timedelta(hours=22)).dt.tz_localize(LOCAL_TZ)
+        von = sd["Von"].where(sd["Von"] >= d_start, d_start)
+        bis = sd["Bis"].where(sd["Bis"] <= d_end, d_end)
+        sd["Von"] = von.where(von >= start, start)
+        sd["Bis"] = bis.where(bis <= end, end)
+        parts.append(sd[sd["Bis"] > sd["Von"]])
+
+    # Mehrtaegige: pro Zeile n Tage per np.repeat aufspannen, dann alles auf einmal clippen
+    multi = df[~same_day]
+    st = multi["Von"].where(multi["Von"] >= start, start)
+    en = multi["Bis"].where(multi["Bis"] <= end, end)
+    valid = (en > st).to_numpy()
+    if valid.any():
+        st, en = st[valid], en[valid]
+        st_day = st.dt.tz_localize(None).dt.normalize().to_numpy()
+        en_day = en.dt.tz_localize(None).dt.normalize().to_numpy()
+        n_days = ((en_day - st_day) // np.timedelta64(1, "D")).astype(np.int64) + 1
+        pos = np.repeat(np.flatnonzero(valid), n_days)
+        # Tagesnummer innerhalb der jeweiligen Buchung: 0, 1, ..., n-1
+        offset = np.arange(n_days.sum()) - np.repeat(np.cumsum(n_days) - n_days, n_days)
+        days = pd.DatetimeIndex(np.repeat(st_day, n_days) + offset * np.timedelta64(1, "D"))
+        d_starts = (days + pd.Timedelta(hours=6)).tz_localize(LOCAL_TZ)
+        d_ends = (days + pd.Timedelta(hours=22)).tz_localize(LOCAL_TZ)
+        rep = np.repeat(np.arange(len(st)), n_days)
+        st_rep = pd.DatetimeIndex(st.iloc[rep])
+        en_rep = pd.DatetimeIndex(en.iloc[rep])
+        vons = st_rep.where(st_rep >= d_starts, d_starts)
+        biss = en_rep.where(en_rep <= d_ends, d_ends)
+        keep = np.asarray(biss > vons)
+        if keep.any():
+            md = multi.iloc[pos[keep]].copy()
+            md["Von"] = vons[keep]
+            md["Bis"] = biss[keep]
+            parts.append(md)
+    parts = [p for p in parts if not p.empty]
+    if not parts:
         return df.iloc[0:0].copy()
-    out = pd.DataFrame(rows)
+    out = pd.concat(parts, ignore_index=True)
     return out.sort_values(["Von", "Raum"]).reset_index(drop=True)
 
 
 # ------------------ HTML-Tafel ------------------
 
+# Vorlagen einmal beim Laden; pro Zelle/Balken nur noch str.format
+_HTML_CSS = """
+    <style>body{font-family:system-ui,-apple-system,Segoe UI,Roboto,Ubuntu,Arial,sans-serif;margin:16px}.grid{display:grid;grid-template-columns:200px repeat(7,1fr);gap:8px}.h{font-weight:600;background:#f4f6f8;padding:8px;border:1px solid #e5e7eb;border-radius:8px;text-align:center}.r{background:#fff;padding:8px;border:1px solid #e5e7eb;border-radius:8px}.cell{position:relative;height:60px;background:#fafafa;border:1px dashed #e5e7eb;border-radius:8px;overflow:hidden}.bar{position:absolute;left:0;right:0;height:22px;margin:2px;border-radius:6px;background:#7c3aed;opacity:.85;color:#fff;font-size:12px;line-height:22px;padding:0 6px;white-space:nowrap;overflow:hidden;text-overflow:ellipsis}</style>
+    """
+_HTML_HEAD = "<html><head><meta charset='utf-8'>" + _HTML_CSS + "</head><body>"
+_TITLE_TPL = (
+    "<h2>Belegungen {start} - {end}</h2><div class='grid'><div class='h'>Raum</div>"
+)
+_DAY_HEAD_TPL = "<div class='h'>{day}</div>"
+_ROOM_TPL = "<div class='r'><div><b>{room}</b></div></div>"
+_CELL_TPL = "<div class='cell'>{bars}</div>"
+_BAR_TPL = (
+    "<div class='bar' style='left:{left:.2f}%;width:{width:.2f}%' "
+    "title='{label}'>{label}</div>"
+)
+_HTML_TAIL = "</div></body></html>"
+
 
 def export_html_timeline(df: pd.DataFrame, dest: Path) -> None:
     if df.empty:
@@ -310,67 +537,77 @@ def export_html_timeline(df: pd.DataFrame, dest: Path) -> None:
         print(f"[HTML] Tafel: {dest}")
         return
     start, end = compute_window_days_7()
-    days = [start + pd.Timedelta(days=i) for i in range(7)]
+    days = window_days()
 
-    rooms = (
-        df[["Raumcode", "Raum"]]
-        .assign(_key=df["Raumcode"].fillna("") + "|" + df["Raum"].fillna(""))
-        .drop_duplicates(subset="_key")
-    )
-    room_order = (
-        rooms["Raumcode"].replace("", pd.NA).fillna(rooms["Raum"]).fillna("").tolist()
+    rooms = df[["Raumcode", "Raum"]].drop_duplicates()
+    codes = rooms["Raumcode"].fillna("").astype(str)
+    room_order = codes.where(codes.str.len() > 0, rooms["Raum"]).fillna("").tolist()
+
+    all_codes = df["Raumcode"].fillna("").astype(str)
+    room_key = all_codes.where(all_codes != "", df["Raum"].fillna("").astype(str))
+    # Zeiten einmal als int64-ns (UTC); Tagesgrenzen ebenso -> reine Integer-Arithmetik
+    von_ns = df["Von"].dt.as_unit("ns").astype("int64").to_numpy()
+    bis_ns = df["Bis"].dt.as_unit("ns").astype("int64").to_numpy()
+    keys_all = room_key.to_numpy()
+
+    def local_ns(day: date, hour: int) -> int:
+        return pd.Timestamp(day.year, day.month, day.day, hour, tzinfo=LOCAL_TZ).value
+
+    # je Tag: [Mitternacht, 06:00, 22:00, naechste Mitternacht] in ns
+    days_ns = np.array(
+        [
+            [
+                local_ns(x, 0),
+                local_ns(x, 6),
+                local_ns(x, 22),
+                local_ns(x + timedelta(days=1), 0),
+            ]
+            for x in (d.date() for d in days)
+        ],
+        dtype=np.int64,
     )
 
-    by_room: Dict[str, List[pd.Series]] = {r: [] for r in room_order}
-    for _, row in df.iterrows():
-        rc = str(row["Raumcode"] or row["Raum"] or "")
-        by_room.setdefault(rc, []).append(row)
+    cells: Dict[Tuple[str, int], List[str]] = {}
+    for i, (midnight, day_start, day_end, next_midnight) in enumerate(days_ns):
+        total = float(day_end - day_start)
+        on_day = (von_ns < next_midnight) & (bis_ns >= midnight)
+        s = np.maximum(von_ns[on_day], day_start)
+        e = np.minimum(bis_ns[on_day], day_end)
+        ok = e > s
+        s, e, keys = s[ok], e[ok], keys_all[on_day][ok]
+        if not len(s):
+            continue
+        left = (s - day_start) * 100.0 / total
+        width = (e - s) * 100.0 / total
+        hhmm_s = pd.to_datetime(s, utc=True).tz_convert(LOCAL_TZ).strftime("%H:%M")
+        hhmm_e = pd.to_datetime(e, utc=True).tz_convert(LOCAL_TZ).strftime("%H:%M")
+        for rk, lft, wid, a, b in zip(keys, left, width, hhmm_s, hhmm_e):
+            label = f"{a} - {b}"
+            cells.setdefault((rk, i), []).append(
+                _BAR_TPL.format(left=lft, width=wid, label=label)
+            )
 
-    css = """
-    <style>body{font-family:system-ui,-apple-system,Segoe UI,Roboto,Ubuntu,Arial,sans-serif;margin:16px}.grid{display:grid;grid-template-columns:200px repeat(7,1fr);gap:8px}.h{font-weight:600;background:#f4f6f8;padding:8px;border:1px solid #e5e7eb;border-radius:8px;text-align:center}.r{background:#fff;padding:8px;border:1px solid #e5e7eb;border-radius:8px}.cell{position:relative;height:60px;background:#fafafa;border:1px dashed #e5e7eb;border-radius:8px;overflow:hidden}.bar{position:absolute;left:0;right:0;height:22px;margin:2px;border-radius:6px;background:#7c3aed;opacity:.85;color:#fff;font-size:12px;line-height:22px;padding:0 6px;white-space:nowrap;overflow:hidden;text-overflow:ellipsis}</style>
-    """
-    html = [
-        "<html><head><meta charset='utf-8'>",
-        css,
-        "</head><body>",
-        f"<h2>Belegungen {start.strftime('%d.%m.%Y')} - {end.strftime('%d.%m.%Y')}</h2>",
-        "<div class='grid'>",
-        "<div class='h'>Raum</div>",
-    ]
-    for d in days:
-        html.append(f"<div class='h'>{d.strftime('%a %d.%m')}</div>")
-    for room in room_order:
-        html.append(f"<div class='r'><div><b>{room}</b></div></div>")
-        for d in days:
-            html.append("<div class='cell'>")
-            day_start = pd.Timestamp(d.year, d.month, d.day, 6, 0, 0, tzinfo=LOCAL_TZ)
-            day_end = pd.Timestamp(d.year, d.month, d.day, 22, 0, 0, tzinfo=LOCAL_TZ)
-            total = (day_end - day_start).total_seconds()
-            for r in by_room.get(room, []):
-                st = r["Von"].tz_convert(LOCAL_TZ)
-                en = r["Bis"].tz_convert(LOCAL_TZ)
-                if st.date() > d.date() or en.date() < d.date():
-                    continue
-                s = max(st, day_start)
-                e = min(en, day_end)
-                if e <= s:
-                    continue
-                left = (s - day_start).total_seconds() / total * 100.0
-                width = (e - s).total_seconds() / total * 100.0
-                label = f"{s.strftime('%H:%M')} - {e.strftime('%H:%M')}"
-                html.append(
-                    f"<div class='bar' style='left:{left:.2f}%;width:{width:.2f}%' title='{label}'>{label}</div>"
-                )
-            html.append("</div>")
-    html.append("</div></body></html>")
-    dest.write_text("".join(html), encoding="utf-8")
+    with dest.open("w", encoding="utf-8", buffering=1 << 20) as fh:
+        fh.write(_HTML_HEAD)
+        fh.write(
+            _TITLE_TPL.format(
+                start=start.strftime("%d.%m.%Y"), end=end.strftime("%d.%m.%Y")
+            )
+        )
+        fh.write("".join(_DAY_HEAD_TPL.format(day=d.strftime("%a %d.%m")) for d in days))
+        for room in room_order:
+            fh.write(_ROOM_TPL.format(room=room))
+            for i in range(len(days)):
+                fh.write(_CELL_TPL.format(bars="".join(cells.get((room, i), ()))))
+        fh.write(_HTML_TAIL)
     print(f"[HTML] Tafel: {dest}")
 
 
 # ------------------ Google Calendar ------------------
 
 
-def load_gcal_service():
+def load_gcal_credentials() -> Credentials:
+    """token.json laden, bei Bedarf erneuern bzw. OAuth-Flow starten (nur im Hauptthread aufrufen)."""
     creds = None
     tp = SCRIPT_DIR / "token.json"
     if tp.exists():
@@ -384,21 +621,31 @@ def load_gcal_service():
             )
             creds = flow.run_local_server(port=0)
         tp.write_text(creds.to_json(), encoding="utf-8")
-    return build("calendar", "v3", credentials=creds)
+    return creds
+
 
+def load_gcal_service(creds: Optional[Credentials] = None):
+    return build("calendar", "v3", credentials=creds or load_gcal_credentials())
 
-def get_or_create_calendar(service, calendar_name: str) -> str:
+
+def list_all_calendars(service) -> Dict[str, str]:
+    """Liest die komplette calendarList einmal und liefert {summary: id}."""
+    cals: Dict[str, str] = {}
     page_token = None
     while True:
         resp = (
             service.calendarList().list(pageToken=page_token, maxResults=250).execute()
         )
         for item in resp.get("items", []):
-            if item.get("summary") == calendar_name:
-                return item["id"]
+            # erster Treffer gewinnt, wie bisher bei der linearen Suche
+            cals.setdefault(item.get("summary"), item["id"])
         page_token = resp.get("nextPageToken")
         if not page_token:
             break
+    return cals
+
+
+def _create_calendar(service, calendar_name: str) -> str:
     created = (
         service.calendars()
         .insert(body={"summary": calendar_name, "timeZone": "Europe/Zurich"})
@@ -407,28 +654,201 @@ def get_or_create_calendar(service, calendar_name: str) -> str:
     return created["id"]
 
 
+def _save_calendar_cache(cals: Dict[str, str]) -> None:
+    payload = {"ts": time.time(), "calendars": cals}
+    try:
+        CALENDAR_CACHE_PATH.write_text(json.dumps(payload), encoding="utf-8")
+    except OSError as e:
+        print(f"[GCAL] Kalender-Cache nicht geschrieben: {e}")
+
+
+def load_calendar_cache(service) -> Dict[str, str]:
+    """{summary: id} aus calendar_cache.json (max. 24 h alt), sonst frisch von Google."""
+    try:
+        payload = json.loads(CALENDAR_CACHE_PATH.read_text(encoding="utf-8"))
+        if time.time() - float(payload["ts"]) < CALENDAR_CACHE_TTL_SECS:
+            return dict(payload["calendars"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    cals = list_all_calendars(service)
+    _save_calendar_cache(cals)
+    return cals
+
+
+_thread_state = threading.local()
+
+
+def _thread_service(creds: Credentials):
+    """Eigener Service pro Worker-Thread (httplib2 ist nicht threadsicher).
+
+    Nutzt die Credentials des Hauptthreads: kein erneutes Lesen/Schreiben von token.json
+    und kein OAuth-Flow pro Thread.
+    """
+    svc = getattr(_thread_state, "service", None)
+    if svc is None:
+        http = AuthorizedHttp(creds, http=httplib2.Http())
+        svc = _thread_state.service = build("calendar", "v3", http=http)
+    return svc
+
+
+def get_or_create_calendar(
+    service, calendar_name: str, cache: Optional[Dict[str, str]] = None
+) -> str:
+    if cache is None:
+        cache = list_all_calendars(service)
+    cal_id = cache.get(calendar_name)
+    if cal_id:
+        return cal_id
+    cal_id = _create_calendar(service, calendar_name)
+    cache[calendar_name] = cal_id
+    _save_calendar_cache(cache)
+    return cal_id
+
+
+_calendar_cache_lock = threading.Lock()
+
+
+def _refresh_calendar_id(
+    service, calendar_name: str, cache: Dict[str, str], stale_id: str
+) -> str:
+    """Gecachte ID gibt es nicht mehr: Liste neu laden, Cache neu schreiben, ggf. neu anlegen."""
+    with _calendar_cache_lock:
+        # ein anderer Bucket-Thread hat den Cache evtl. schon erneuert
+        if cache.get(calendar_name) == stale_id:
+            cache.clear()
+            cache.update(list_all_calendars(service))
+            _save_calendar_cache(cache)
+        return get_or_create_calendar(service, calendar_name, cache)
+
+
+def push_to_calendar(
+    service, calendar_name: str, cal_id: str, df: pd.DataFrame, cache: Dict[str, str]
+) -> None:
+    """list_own_events + push_events; bei 404/410 (Kalender geloescht/umbenannt) einmal neu aufloesen."""
+    try:
+        existing = list_own_events(service, cal_id)
+    except HttpError as e:
+        if e.resp.status not in (404, 410):
+            raise
+        print(f"[GCAL] Kalender '{calendar_name}' ({cal_id}) nicht gefunden - Cache wird erneuert.")
+        cal_id = _refresh_calendar_id(service, calendar_name, cache, cal_id)
+        existing = list_own_events(service, cal_id)
+    push_events(service, cal_id, df, existing)
+
+
 def rfc3339_utc(ts: pd.Timestamp) -> str:
     if ts.tzinfo is None:
         ts = ts.tz_localize(LOCAL_TZ)
     return ts.tz_convert("UTC").isoformat().replace("+00:00", "Z")
 
 
+def _vec_rfc3339_utc(s: pd.Series) -> pd.Series:
+    """Wie rfc3339_utc, aber fuer eine ganze Spalte in einem Durchgang."""
+    idx = pd.DatetimeIndex(s)
+    if idx.tz is None:
+        idx = idx.tz_localize(LOCAL_TZ)
+    return pd.Series(
+        idx.tz_convert("UTC").strftime("%Y-%m-%dT%H:%M:%SZ"), index=s.index
+    )
+
+
 def fingerprint(row) -> str:
     base = f"{row['Von'].isoformat()}|{row['Bis'].isoformat()}|{row.get('Raum','')}|{row.get('Standort','')}"
     return hashlib.sha1(base.encode("utf-8")).hexdigest()
 
 
-def delete_future_own_events(service, calendar_id: str, horizon_days: int = 8) -> None:
-    now_utc = pd.Timestamp.now(tz="UTC").isoformat()
+def fingerprints(df: pd.DataFrame) -> List[str]:
+    """Wie fingerprint(row), aber fuer alle Zeilen: Schluessel spaltenweise bauen, dann hashen."""
+    if df.empty:
+        return []
+
+    def col(name: str) -> pd.Series:
+        # map(str) statt astype(str): NaN -> "nan" wie im f-String von fingerprint()
+        return df[name].map(str) if name in df.columns else pd.Series("", index=df.index)
+
+    base = (
+        df["Von"].map(pd.Timestamp.isoformat)
+        + "|"
+        + df["Bis"].map(pd.Timestamp.isoformat)
+        + "|"
+        + col("Raum")
+        + "|"
+        + col("Standort")
+    )
+    # sha1 bleibt: die fp stehen in bestehenden Events und muessen stabil sein
+    sha1 = hashlib.sha1
+    return [sha1(b).hexdigest() for b in base.str.encode("utf-8")]
+
+
+def _is_retryable(exc: Exception) -> bool:
+    """Quota-/Server-Fehler, bei denen ein spaeterer Versuch Sinn ergibt."""
+    if not isinstance(exc, HttpError):
+        return False
+    if exc.resp.status == 429 or exc.resp.status >= 500:
+        return True
+    # 403 auch bei fehlenden Rechten -> nur Quota-Fehler erneut versuchen
+    return exc.resp.status == 403 and "rate" in str(exc).lower()
+
+
+def _execute_batch(service, requests: list, label: str) -> Tuple[int, int]:
+    """Fuehrt API-Requests in Batches zu je 50 aus; Quota-Fehler mit Backoff erneut.
+
+    Liefert (erfolgreich, fehlgeschlagen).
+    """
+    ok = 0
+    failed = 0
+    pending = list(requests)
+    for attempt in range(GCAL_BATCH_RETRIES + 1):
+        retry: list = []
+        for i in range(0, len(pending), GCAL_BATCH_SIZE):
+            chunk = pending[i : i + GCAL_BATCH_SIZE]
+
+            def on_done(request_id, response, exception, chunk=chunk):
+                nonlocal ok, failed
+                if exception is None:
+                    ok += 1
+                elif _is_retryable(exception) and attempt < GCAL_BATCH_RETRIES:
+                    retry.append(chunk[int(request_id)])
+                else:
+                    failed += 1
+                    print(f"[GCAL] {label} fehlgeschlagen: {exception}")
+
+            batch = service.new_batch_http_request(callback=on_done)
+            for n, req in enumerate(chunk):
+                batch.add(req, request_id=str(n))
+            try:
+                batch.execute()
+            except HttpError as e:
+                # ganzer Batch abgelehnt (z. B. 503) -> alle Requests des Blocks erneut
+                if not _is_retryable(e) or attempt == GCAL_BATCH_RETRIES:
+                    raise
+                retry.extend(chunk)
+        if not retry:
+            break
+        wait_s = 2**attempt
+        print(
+            f"[GCAL] Rate-Limit/Serverfehler bei {len(retry)} Requests, neuer Versuch in {wait_s}s"
+        )
+        time.sleep(wait_s)
+        pending = retry
+    return ok, failed
+
+
+def list_own_events(
+    service, calendar_id: str, horizon_days: int = 8
+) -> Dict[str, List[str]]:
+    """Eigene Events (SOURCE_TAG) im Fenster als {fp: [eventId, ...]}."""
+    # ab Fensterbeginn (heute 00:00), damit auch heute schon vergangene Slots erkannt werden
+    min_utc = compute_window_days_7()[0].tz_convert("UTC").isoformat()
     max_utc = (pd.Timestamp.now(tz="UTC") + pd.Timedelta(days=horizon_days)).isoformat()
-    to_delete = []
+    existing: Dict[str, List[str]] = {}
     page_token = None
     while True:
         resp = (
             service.events()
             .list(
                 calendarId=calendar_id,
-                timeMin=now_utc,
+                timeMin=min_utc,
                 timeMax=max_utc,
                 singleEvents=True,
                 maxResults=2500,
@@ -439,50 +859,95 @@ def delete_future_own_events(service, calendar_id: str, horizon_days: int = 8) -
         for ev in resp.get("items", []):
             props = ev.get("extendedProperties", {}).get("private", {})
             if props.get("source") == SOURCE_TAG:
-                to_delete.append(ev["id"])
+                existing.setdefault(props.get("fp") or "", []).append(ev["id"])
         page_token = resp.get("nextPageToken")
         if not page_token:
             break
-    for eid in to_delete:
-        service.events().delete(
-            calendarId=calendar_id, eventId=eid, sendUpdates="none"
-        ).execute()
-    if to_delete:
-        print(f"[GCAL] Alte Events geloescht: {len(to_delete)}")
+    return existing
+
+
+def delete_events(service, calendar_id: str, event_ids: List[str]) -> None:
+    if not event_ids:
+        return
+    deleted, _ = _execute_batch(
+        service,
+        [
+            service.events().delete(
+                calendarId=calendar_id, eventId=eid, sendUpdates="none"
+            )
+            for eid in event_ids
+        ],
+        "Loeschen",
+    )
+    print(f"[GCAL] Alte Events geloescht: {deleted}")
 
 
-def push_events(service, calendar_id: str, df: pd.DataFrame) -> None:
+def push_events(
+    service,
+    calendar_id: str,
+    df: pd.DataFrame,
+    existing: Optional[Dict[str, List[str]]] = None,
+) -> None:
+    """Traegt df ein. Mit existing ({fp: ids}) nur den Unterschied: fehlende rein, veraltete raus."""
+    if existing is None:
+        existing = {}
+    fps = fingerprints(df)
+    target = set(fps)
+    # veraltete Events und Duplikate (gleicher fp mehrfach) loeschen
+    to_delete = [
+        eid
+        for fp, ids in existing.items()
+        for eid in (ids[1:] if fp in target else ids)
+    ]
+    delete_events(service, calendar_id, to_delete)
     if df.empty:
         print("[GCAL] Keine Events zu pushen.")
         return
-    inserted = 0
-    for _, r in df.iterrows():
+    requests = []
+    seen = set(existing)
+    starts = _vec_rfc3339_utc(df["Von"])
+    ends = _vec_rfc3339_utc(df["Bis"])
+
+    def col(name: str) -> list:
+        if name not in df.columns:
+            return [""] * len(df)
+        return df[name].fillna("").astype(str).tolist()
+
+    for raum, st, rc, start_utc, end_utc, fp in zip(
+        col("Raum"), col("Standort"), col("Raumcode"), starts, ends, fps
+    ):
+        if fp in seen:
+            continue
+        seen.add(fp)
         parts = ["Belegt"]
-        rc = str(r.get("Raumcode") or "").strip()
-        st = str(r.get("Standort") or "").strip()
+        rc = rc.strip()
+        st = st.strip()
         if rc:
             parts.append(rc)
         if st:
             parts.append(st)
         summary = " - ".join(parts)
-        loc = str(r.get("Raum") or "")
+        loc = raum
         loc = f"{loc} | {st}" if st and loc else (st or loc)
         body = {
             "summary": summary,
             "location": loc,
-            "start": {"dateTime": rfc3339_utc(r["Von"]), "timeZone": "UTC"},
-            "end": {"dateTime": rfc3339_utc(r["Bis"]), "timeZone": "UTC"},
+            "start": {"dateTime": start_utc, "timeZone": "UTC"},
+            "end": {"dateTime": end_utc, "timeZone": "UTC"},
             "visibility": "private",
             "transparency": "opaque",
-            "extendedProperties": {
-                "private": {"source": SOURCE_TAG, "fp": fingerprint(r)}
-            },
+            "extendedProperties": {"private": {"source": SOURCE_TAG, "fp": fp}},
         }
-        service.events().insert(
-            calendarId=calendar_id, body=body, sendUpdates="none"
-        ).execute()
-        inserted += 1
-    print(f"[GCAL] Eingetragen: {inserted} Events")
+        requests.append(
+            service.events().insert(
+                calendarId=calendar_id, body=body, sendUpdates="none"
+            )
+        )
+    inserted, _ = _execute_batch(service, requests, "Eintragen")
+    print(
+        f"[GCAL] Eingetragen: {inserted} Events "
+        f"(unveraendert: {len(target & set(existing))})"
+    )
 
 
 def _bucket_from_standort(standort: str, mode: str) -> str:
@@ -500,24 +965,48 @@ def _calendar_name_for_bucket(base_name: str, bucket: str) -> str:
 
 
 def group_and_push_by_calendar(
-    service, base_calendar_name: str, df: pd.DataFrame, split_by: str
+    service,
+    base_calendar_name: str,
+    df: pd.DataFrame,
+    split_by: str,
+    creds: Optional[Credentials] = None,
 ) -> None:
     if df.empty:
         print("[GCAL] Keine Events zu pushen.")
         return
+    # Kalenderliste nur einmal holen (bzw. aus dem Cache), nicht pro Bucket
+    cache = load_calendar_cache(service)
     if split_by == "none":
-        cal_id = get_or_create_calendar(service, base_calendar_name)
-        delete_future_own_events(service, cal_id, horizon_days=8)
-        push_events(service, cal_id, df)
+        cal_id = get_or_create_calendar(service, base_calendar_name, cache)
+        push_to_calendar(service, base_calendar_name, cal_id, df, cache)
         return
     mode = "standort" if split_by == "standort" else "gebaeude"
-    work = df.copy()
-    work["__bucket"] = work["Standort"].apply(lambda s: _bucket_from_standort(s, mode))
-    for bucket, part in work.groupby("__bucket", dropna=False):
+    # wenige Standorte, viele Zeilen: Bucket je eindeutigem Wert, dann per map verteilen
+    sites = df["Standort"]
+    bucket_of = {s: _bucket_from_standort(s, mode) for s in sites.unique()}
+    buckets = sites.map(bucket_of).rename(None)
+    # Kalender-IDs im Hauptthread aufloesen (Cache wird dabei ggf. ergaenzt)
+    jobs = []
+    for bucket, part in df.groupby(buckets, dropna=False):
         cal_name = _calendar_name_for_bucket(base_calendar_name, str(bucket))
-        cal_id = get_or_create_calendar(service, cal_name)
-        delete_future_own_events(service, cal_id, horizon_days=8)
-        push_events(service, cal_id, part.drop(columns=["__bucket"], errors="ignore"))
+        cal_id = get_or_create_calendar(service, cal_name, cache)
+        jobs.append((cal_name, cal_id, part))
+
+    if len(jobs) == 1:
+        push_to_calendar(service, *jobs[0], cache)
+        return
+
+    if creds is None:
+        creds = load_gcal_credentials()
+
+    def sync_bucket(cal_name: str, cal_id: str, part: pd.DataFrame) -> None:
+        push_to_calendar(_thread_service(creds), cal_name, cal_id, part, cache)
+
+    # Buckets sind unabhaengig -> parallel; Wartezeit ~ max statt Summe der Buckets
+    with ThreadPoolExecutor(max_workers=min(GCAL_SYNC_WORKERS, len(jobs))) as pool:
+        futures = [pool.submit(sync_bucket, *job) for job in jobs]
+        for fut in futures:
+            fut.result()
 
 
 # ------------------ Login & Filter & Grid ------------------
@@ -554,22 +1043,29 @@ async def ensure_logged_in(page: Page, timeout_ms: int) -> None:
         if await page.locator(
             "#KmsiCheckbox, input[name='DontShowAgain']"
         ).first.is_visible():
+            # kurzer Timeout: sonst greift der Default (--timeout), wenn nur DontShowAgain da ist
             try:
-                await page.check("#KmsiCheckbox")
+                await page.check("#KmsiCheckbox", timeout=1000)
             except Exception:
                 pass
-            for sel in [
+            kmsi_sels = [
                 "#idSIButton9",
                 "button:has-text('Ja')",
                 "input[type='submit']:has-text('Ja')",
-            ]:
-                try:
-                    if await page.locator(sel).is_visible():
+            ]
+            # Sichtbarkeit aller Kandidaten parallel pruefen, dann den ersten klicken
+            visible = await asyncio.gather(
+                *(page.locator(sel).first.is_visible() for sel in kmsi_sels),
+                return_exceptions=True,
+            )
+            for sel, vis in zip(kmsi_sels, visible):
+                if vis is True:
+                    try:
                         await page.click(sel)
                         await page.wait_for_timeout(600)
-                        break
-                except Exception:
-                    pass
+                    except Exception:
+                        pass
+                    break
     except Exception:
         pass
 
@@ -582,17 +1078,15 @@ async def ensure_logged_in(page: Page, timeout_ms: int) -> None:
                 await page.fill(user_sel, user)
             if await page.locator(pass_sel).first.is_visible() and pw:
                 await page.fill(pass_sel, pw)
-            for sel in [
-                "button[type='submit']",
-                "button:has-text('Anmelden')",
-                "input[type='submit']",
-            ]:
-                try:
-                    if await page.locator(sel).first.is_visible():
-                        await page.click(sel)
-                        break
-                except Exception:
-                    pass
+            # ein Union-Locator (nur sichtbare Treffer) statt is_visible pro Selektor
+            try:
+                await page.locator(
+                    "button[type='submit']:visible, "
+                    "button:has-text('Anmelden'):visible, "
+                    "input[type='submit']:visible"
+                ).first.click(timeout=2000)
+            except Exception:
+                pass
             await page.wait_for_timeout(1000)
     except Exception:
         pass
@@ -650,45 +1144,229 @@ async def apply_7day_filter_and_search(page: Page) -> Tuple[bool, bool, bool, st
         return False, False, False, f"err={e}"
 
 
-async def wait_for_results_frame(page: Page, timeout_ms: int) -> Frame:
-    sel_candidates = [
+_GRID_MUTATION_JS = """(arg) => new Promise(resolve => {
+    const root = document.querySelector(arg.sel);
+    let obs = null;
+    if (root) {
+      obs = new MutationObserver(() => { obs.disconnect(); resolve(true); });
+      obs.observe(root, {childList: true, subtree: true});
+    }
+    setTimeout(() => { if (obs) obs.disconnect(); resolve(false); }, arg.ms);
+})"""
+
+
+async def wait_for_grid_mutation(frame: Frame, timeout_ms: int) -> bool:
+    """Wartet per MutationObserver auf geaenderte Grid-Zeilen (max. timeout_ms)."""
+    try:
+        return bool(
+            await frame.evaluate(
+                _GRID_MUTATION_JS,
+                {"sel": "div.k-grid-content, #contentgrid", "ms": timeout_ms},
+            )
+        )
+    except Exception:
+        return False
+
+
+async def wait_for_dom_ready(page: Page, timeout_ms: int = 5000) -> None:
+    """Pollt document.readyState (100 ms) statt auf networkidle zu warten."""
+    try:
+        await page.wait_for_function(
+            "() => document.readyState === 'complete'",
+            timeout=timeout_ms,
+            polling=100,
+        )
+    except Exception:
+        pass
+
+
+RESULT_ROW_SELECTOR = ", ".join(
+    [
         "div.k-grid-content table tbody tr",
         "div.k-grid-content table tr",
         "#contentgrid table tbody tr",
         "table.k-selectable tbody tr",
         "table tbody tr",
     ]
-    for sel in sel_candidates:
-        try:
-            await page.wait_for_selector(
-                sel, timeout=min(4000, timeout_ms), state="visible"
+)
+
+
+# so lange darf der Hauptframe noch nachziehen, wenn zuerst ein iframe Zeilen zeigt
+MAIN_FRAME_GRACE_MS = 1000
+
+
+async def find_results_frame(page: Page, timeout_ms: int) -> Optional[Frame]:
+    """Sucht in allen Frames gleichzeitig nach Grid-Zeilen; der Hauptframe hat Vorrang.
+
+    page.frames kennt Playwright ohnehin lokal - teuer war nur das Nacheinander der Selektoren.
+    Trifft zuerst ein iframe, bekommt der Hauptframe noch MAIN_FRAME_GRACE_MS, bevor das
+    iframe genommen wird (die Vereinigung enthaelt das generische 'table tbody tr').
+    """
+    main = page.main_frame
+    probes = {
+        asyncio.create_task(
+            fr.wait_for_selector(
+                RESULT_ROW_SELECTOR, timeout=min(4000, timeout_ms), state="visible"
             )
-            return page.main_frame
-        except Exception:
-            pass
-    for fr in page.frames:
-        for sel in sel_candidates:
-            try:
-                await fr.wait_for_selector(sel, timeout=2000, state="visible")
-                return fr
-            except Exception:
+        ): fr
+        for fr in page.frames
+    }
+    main_probe = next((t for t, fr in probes.items() if fr is main), None)
+    pending = set(probes)
+    found: Optional[Frame] = None
+    try:
+        while pending and found is None:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            hits = [probes[t] for t in done if not t.exception()]
+            if not hits:
                 continue
-    return page.main_frame
+            if main in hits:
+                found = main
+            elif main_probe is not None and main_probe in pending:
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(main_probe), MAIN_FRAME_GRACE_MS / 1000
+                    )
+                    found = main
+                except Exception:
+                    found = hits[0]
+            else:
+                found = hits[0]
+    finally:
+        for t in pending:
+            t.cancel()
+        await asyncio.gather(*probes, return_exceptions=True)
+    return found
 
 
-async def extract_kendo_grid(frame: Frame) -> pd.DataFrame:
-    headers = await frame.eval_on_selector_all(
-        "div.k-grid-header thead tr th", "els => els.map(th => th.innerText.trim())"
-    )
-    rows = await frame.eval_on_selector_all(
-        "div.k-grid-content table tbody tr",
-        "els => els.map(tr => Array.from(tr.children).map(td => td.innerText.trim()))",
-    )
-    if not rows:
-        rows = await frame.eval_on_selector_all(
-            "table tbody tr",
-            "els => els.map(tr => Array.from(tr.children).map(td => td.innerText.trim()))",
+async def wait_for_results_frame(page: Page, timeout_ms: int) -> Frame:
+    """Wie find_results_frame; ohne Treffer der Hauptframe als Vermutung."""
+    return await find_results_frame(page, timeout_ms) or page.main_frame
+
+
+# gefundener Grid-Frame pro Seiten-URL; jede Navigation leert den Cache (run haengt den Hook ein)
+_FRAME_CACHE: Dict[str, Frame] = {}
+
+
+async def get_results_frame(page: Page, timeout_ms: int) -> Frame:
+    """Wie wait_for_results_frame, aber ohne erneute Frame-Suche solange nichts navigiert hat."""
+    frame = _FRAME_CACHE.get(page.url)
+    if frame is not None and not frame.is_detached():
+        return frame
+    frame = await find_results_frame(page, timeout_ms)
+    if frame is None:
+        # leeres oder noch ladendes Grid: nur raten, nicht cachen (Kendo-Suchen navigieren nicht)
+        return page.main_frame
+    _FRAME_CACHE[page.url] = frame
+    return frame
+
+
+# gemeinsame Bausteine: Zeilen finden (Kendo-Tabelle, sonst erste Tabelle) und billige Signatur
+_GRID_TRS_JS = """
+    let trs = Array.from(document.querySelectorAll('div.k-grid-content table tbody tr'));
+    if (!trs.length) trs = Array.from(document.querySelectorAll('table tbody tr'));"""
+_GRID_SIG_EXPR = "trs.length + '|' + (trs[0] ? trs[0].innerText : '')"
+# Kendo-DataSource direkt lesen (aktuelle Seite = view()); Datumswerte im Format
+# der Tabelle, damit die Normalisierung dieselben Strings sieht wie beim DOM-Lesen.
+# null -> kein jQuery/Kendo-Handle, dann wird die Tabelle aus dem DOM gelesen.
+_GRID_DS_JS = """(n) => {
+    const $ = window.jQuery, el = document.querySelector('.k-grid');
+    const g = $ && el ? $(el).data('kendoGrid') : null;
+    if (!g || !g.dataSource || !g.columns) return null;
+    const cols = g.columns.filter(c => c.field && !c.hidden);
+    if (!cols.length) return null;
+    const p2 = x => String(x).padStart(2, '0');
+    const fmt = v => v == null ? '' : v instanceof Date
+        ? `${p2(v.getDate())}.${p2(v.getMonth() + 1)}.${v.getFullYear()} ${p2(v.getHours())}:${p2(v.getMinutes())}`
+        : String(v).trim();
+    let items = g.dataSource.view();
+    if (n != null) items = items.slice(0, n);
+    return {
+        headers: cols.map(c => (c.title || c.field).trim()),
+        rows: Array.from(items, it => cols.map(c => fmt(it.get ? it.get(c.field) : it[c.field]))),
+    };
+}"""
+_GRID_JS = (
+    "(n) => {"
+    + _GRID_TRS_JS
+    + """
+    const sig = """
+    + _GRID_SIG_EXPR
+    + """;
+    const ds = ("""
+    + _GRID_DS_JS
+    + """)(n);
+    if (ds) return {headers: ds.headers, rows: ds.rows, sig};
+    const headers = Array.from(document.querySelectorAll('div.k-grid-header thead tr th'))
+        .map(th => th.innerText.trim());
+    if (n != null) trs = trs.slice(0, n);
+    const rows = trs.map(tr => Array.from(tr.children).map(td => td.innerText.trim()));
+    return {headers, rows, sig};
+}"""
+)
+_LOADING_DONE_JS = "() => !document.querySelector('.k-loading-mask')"
+
+
+async def wait_for_grid_idle(frame: Frame, timeout_ms: int = 5000) -> None:
+    """Wartet, bis Kendo die Lade-Maske entfernt hat (statt fester Pause)."""
+    try:
+        await frame.wait_for_function(_LOADING_DONE_JS, timeout=timeout_ms)
+    except Exception:
+        pass
+
+
+# Zeilenzahl + Text der ersten Zeile: aendert sich bei Seitenwechsel und Seitengroesse
+_GRID_SIG_JS = "() => {" + _GRID_TRS_JS + " return " + _GRID_SIG_EXPR + "; }"
+
+
+async def grid_signature(frame: Frame) -> str:
+    try:
+        return str(await frame.evaluate(_GRID_SIG_JS))
+    except Exception:
+        return ""
+
+
+async def wait_for_grid_change(frame: Frame, before: str, timeout_ms: int) -> bool:
+    """Pollt (100 ms) im Browser, bis sich das Grid gegenueber 'before' geaendert hat.
+
+    Kommt keine Aenderung, wird wenigstens auf das Ende der Lade-Maske gewartet.
+    """
+    try:
+        await frame.wait_for_function(
+            f"(prev) => ({_GRID_SIG_JS})() !== prev",
+            arg=before,
+            timeout=timeout_ms,
+            polling=100,
         )
+        changed = True
+    except Exception:
+        changed = False
+    await wait_for_grid_idle(frame)
+    return changed
+
+
+async def extract_kendo_grid(
+    frame: Frame, max_rows: Optional[int] = None
+) -> pd.DataFrame:
+    """Liest das Grid in einem evaluate; mit max_rows werden nur die ersten Zeilen uebertragen.
+
+    Bevorzugt die Kendo-DataSource (ein JSON-Block), sonst die Tabellenzellen im DOM.
+    """
+    headers, rows, _ = await _read_grid(frame, max_rows)
+    return _grid_to_df(headers, rows)
+
+
+async def _read_grid(
+    frame: Frame, max_rows: Optional[int] = None
+) -> Tuple[List[str], List[List[str]], str]:
+    """(Kopfzeilen, Zeilen, Signatur) in einem Roundtrip, ohne DataFrame."""
+    res = await frame.evaluate(_GRID_JS, max_rows)
+    return res["headers"], res["rows"], str(res["sig"])
+
+
+def _grid_to_df(headers: List[str], rows: List[List[str]]) -> pd.DataFrame:
     if not rows:
         return pd.DataFrame()
     if not headers:
@@ -701,38 +1379,51 @@ async def extract_kendo_grid(frame: Frame) -> pd.DataFrame:
     return pd.DataFrame(norm_rows, columns=headers)
 
 
-async def kendo_click_next(frame: Frame) -> bool:
-    sels = [
-        "a[aria-label*='next' i]",
-        "a[title*='Weiter' i]",
-        "a[title*='Naechste' i]",
-        "a.k-pager-next",
-        "a.k-link.k-pager-next",
-        "button.k-pager-next",
-    ]
+KENDO_NEXT_SELECTORS = [
+    "a[aria-label*='next' i]",
+    "a[title*='Weiter' i]",
+    "a[title*='Naechste' i]",
+    "a.k-pager-next",
+    "a.k-link.k-pager-next",
+    "button.k-pager-next",
+]
+# zuletzt funktionierender Weiter-Selektor, wird pro Seite zuerst probiert
+_KNOWN_NEXT_SEL: Optional[str] = None
+
+
+async def kendo_click_next(frame: Frame) -> Optional[bool]:
+    """True = geklickt, False = letzte Seite (Weiter deaktiviert), None = kein Weiter-Button."""
+    global _KNOWN_NEXT_SEL
+    sels = KENDO_NEXT_SELECTORS
+    if _KNOWN_NEXT_SEL:
+        sels = [_KNOWN_NEXT_SEL] + [s for s in sels if s != _KNOWN_NEXT_SEL]
     for sel in sels:
         try:
-            el = await frame.wait_for_selector(sel, timeout=800)
+            el = await frame.wait_for_selector(
+                sel, timeout=2000 if sel == _KNOWN_NEXT_SEL else 800
+            )
             if not el:
                 continue
+            _KNOWN_NEXT_SEL = sel
             disabled = await el.get_attribute("aria-disabled")
             cls = (await el.get_attribute("class")) or ""
             if disabled == "true" or "k-disabled" in cls or "k-state-disabled" in cls:
                 return False
-            await el.click()
+            await el.click(timeout=2000)
             return True
         except Exception:
             continue
-    return False
+    return None
 
 
-async def try_set_page_size(frame: Frame, target: int = 200) -> None:
+async def try_set_page_size(frame: Frame, target: int = 200) -> bool:
+    """True, wenn eine Seitengroesse ausgewaehlt wurde."""
     try:
         sel = await frame.query_selector("select.k-pager-sizes")
         if sel:
             try:
-                await sel.select_option(str(target))
-                return
+                await sel.select_option(str(target), timeout=1000)
+                return True
             except Exception:
                 pass
     except Exception:
@@ -742,50 +1433,75 @@ async def try_set_page_size(frame: Frame, target: int = 200) -> None:
             ".k-pager-sizes .k-dropdown, .k-pager-sizes .k-combobox"
         )
         if dd:
-            await dd.click()
+            await dd.click(timeout=1000)
             opt = await frame.wait_for_selector(
                 f".k-list .k-item:has-text('{target}')", timeout=1200
             )
             if opt:
-                await opt.click()
+                await opt.click(timeout=1000)
+                return True
     except Exception:
         pass
+    return False
 
 
 async def collect_all_pages(
-    page: Page, timeout_ms: int, max_pages: int = 200
-) -> pd.DataFrame:
-    frame = await wait_for_results_frame(page, timeout_ms)
-    await try_set_page_size(frame, 200)
-    await page.wait_for_timeout(600)
-    all_dfs: List[pd.DataFrame] = []
-    seen_first_row: set[str] = set()
+    page: Page, timeout_ms: int, max_pages: int = 200, frame: Optional[Frame] = None
+) -> Tuple[pd.DataFrame, bool]:
+    """Alle Grid-Seiten lesen; liefert (Zeilen, vollstaendig).
+
+    Vollstaendig nur, wenn die letzte Seite erreicht wurde (Weiter deaktiviert oder gar kein
+    Pager). Abbruch ueber max_pages, fehlenden Weiter-Button oder eine haengende Seite
+    (gleicher Inhalt nach dem Klick) liefert vollstaendig=False.
+    """
+    if frame is None:
+        frame = await get_results_frame(page, timeout_ms)
+    before = await grid_signature(frame)
+    if await try_set_page_size(frame, 200):
+        # bleibt das Grid gleich (schon 200 oder wenige Zeilen), nur kurz warten
+        await wait_for_grid_change(frame, before, 1500)
+    headers: List[str] = []
+    all_rows: List[List[str]] = []
+    seen_pages: set[int] = set()
+    complete = False
     for _ in range(max_pages):
-        dfp = await extract_kendo_grid(frame)
-        if dfp is None or dfp.empty:
+        page_headers, rows, before = await _read_grid(frame)
+        if not rows:
+            # leeres Grid auf der ersten Seite = keine Reservationen; spaeter = Seite nicht geladen
+            complete = not all_rows
             break
-        try:
-            first_row = "|".join(map(str, dfp.iloc[0].tolist()))
-        except Exception:
-            first_row = f"len={len(dfp)}"
-        if first_row in seen_first_row:
+        # ganze Seite hashen: eine zufaellig gleiche erste Zeile beendet nicht mehr vorzeitig
+        page_key = hash(tuple(map(tuple, rows)))
+        if page_key in seen_pages:
+            print("[GRID] Seite nach Weiter-Klick unveraendert - Abbruch.")
             break
-        seen_first_row.add(first_row)
-        all_dfs.append(dfp)
+        seen_pages.add(page_key)
+        headers = headers or page_headers
+        # nur Zeilen sammeln, DataFrame erst ganz am Ende
+        all_rows.extend(rows)
+        # Signatur kam schon mit dem Auslesen -> kein extra Roundtrip vor dem Klick
         clicked = await kendo_click_next(frame)
-        if not clicked:
+        if clicked is False:
+            complete = True
             break
-        await page.wait_for_timeout(600)
-    if not all_dfs:
-        return pd.DataFrame()
-    raw = pd.concat(all_dfs, ignore_index=True).drop_duplicates()
-    return raw
+        if clicked is None:
+            # ohne Pager passt alles auf eine Seite; mit Pager ist der Button nur nicht gefunden
+            complete = await frame.query_selector(".k-pager-wrap, .k-pager") is None
+            if not complete:
+                print("[GRID] Weiter-Button nicht gefunden - Abbruch.")
+            break
+        await wait_for_grid_change(frame, before, min(timeout_ms, 10000))
+    else:
+        print(f"[GRID] Mehr als {max_pages} Seiten - Abbruch.")
+    if not all_rows:
+        return pd.DataFrame(), complete
+    return _grid_to_df(headers, all_rows).drop_duplicates(), complete
 
 
 async def verify_window_matches(page: Page, timeout_ms: int) -> bool:
     try:
-        frame = await wait_for_results_frame(page, timeout_ms)
-        df = await extract_kendo_grid(frame)
+        frame = await get_results_frame(page, timeout_ms)
+        df = await extract_kendo_grid(frame, max_rows=60)
         if df is None or df.empty:
             return False
         lower = {str(c).lower(): c for c in df.columns}
@@ -804,43 +1520,70 @@ async def verify_window_matches(page: Page, timeout_ms: int) -> bool:
         if not (col_von and col_bis):
             return False
 
-        def pdt(x):
-            s = str(x).strip().replace(",", " ")
-            return pd.to_datetime(s, dayfirst=True, errors="coerce")
+        def pdt(col: pd.Series) -> pd.Series:
+            # naiv geparst -> lokal verorten, sonst scheitert der Vergleich mit start/end
+            return _parse_dt_series(col).dt.tz_localize(
+                LOCAL_TZ, ambiguous="NaT", nonexistent="shift_forward"
+            )
 
-        probe = df.head(60).copy()
-        probe["__v"] = probe[col_von].apply(pdt)
-        probe["__b"] = probe[col_bis].apply(pdt)
-        probe = probe[pd.notna(probe["__v"]) & pd.notna(probe["__b"])]
-        if probe.empty:
+        # nur die zwei Spalten parsen; df ist schon auf 60 Zeilen begrenzt (max_rows)
+        von = pdt(df[col_von])
+        bis = pdt(df[col_bis])
+        valid = von.notna() & bis.notna()
+        if not valid.any():
             return False
         start, end = compute_window_days_7()
-        ratio = ((probe["__b"] >= start) & (probe["__v"] <= end)).mean()
+        ratio = ((bis[valid] >= start) & (von[valid] <= end)).mean()
         return bool(ratio >= 0.6)
     except Exception:
         return False
 
 
+def _is_search_response(resp) -> bool:
+    # Suche = Formular-Post/XHR auf .../Find* oder Kendo-Read, keine Skripte/Bilder
+    if resp.request.resource_type not in ("document", "xhr", "fetch"):
+        return False
+    return "Read" in resp.url or "Find" in resp.url
+
+
+async def search_and_wait(page: Page, timeout_ms: int) -> Tuple[bool, bool, bool, str]:
+    """Filter setzen + 'Finden', dann auf die Antwort des Servers warten statt zu pollen.
+
+    Kommt keine passende Antwort (z. B. aus dem Cache), bleibt der MutationObserver als Rueckfall.
+    """
+    res: Tuple[bool, bool, bool, str] = (False, False, False, "")
+    try:
+        async with page.expect_response(
+            _is_search_response, timeout=min(timeout_ms, 10000)
+        ) as resp_info:
+            res = await apply_7day_filter_and_search(page)
+            if not res[2]:
+                raise PWTimeoutError("Finden nicht ausgeloest")
+        await (await resp_info.value).finished()
+        await wait_for_grid_idle(page.main_frame, 2000)
+    except Exception:
+        await wait_for_grid_mutation(page.main_frame, 1200)
+    return res
+
+
 async def ensure_window_or_retry(
     page: Page, timeout_ms: int, attempts: int = 3
 ) -> bool:
     ok = False
     for i in range(attempts):
-        von_ok, bis_ok, searched, tag = await apply_7day_filter_and_search(page)
+        von_ok, bis_ok, searched, tag = await search_and_wait(page, timeout_ms)
         print(
             f"Filter gesetzt (Try {i+1}/{attempts}): Von={von_ok} Bis={bis_ok} | Suche ausgeloest={searched} | {tag}"
         )
-        await page.wait_for_timeout(1200)
         if await verify_window_matches(page, timeout_ms):
             ok = True
             print("[FILTER] Zeitfenster verifiziert.")
             break
         try:
-            btn_reset = page.locator(
+            # click prueft Sichtbarkeit selbst -> ein Roundtrip statt zwei
+            await page.locator(
                 "button:has-text('Zuruecksetzen'), button:has-text('Reset')"
-            ).first
-            if await btn_reset.is_visible():
-                await btn_reset.click()
+            ).first.click(timeout=500)
         except Exception:
             pass
     if not ok:
@@ -853,27 +1596,36 @@ async def ensure_window_or_retry(
 # ------------------ Export-Logik ------------------
 
 
+_HREF_RE = re.compile(r"href=['\"]([^'\"]+)['\"]", re.I)
+# Message-Center-URL je Browser-Kontext (aendert sich innerhalb der Sitzung nicht)
+_MSG_URL_CACHE: Dict[int, str] = {}
+
+
 async def _list_messagecenter_reports(page: Page) -> List[str]:
-    try:
-        msg_url = await page.eval_on_selector(
-            ".notification-container.ui-notify",
-            "el => el.getAttribute('data-messageurl')",
-        )
-    except Exception:
-        msg_url = None
+    msg_url = _MSG_URL_CACHE.get(id(page.context))
+    if not msg_url:
+        try:
+            msg_url = await page.locator(
+                ".notification-container.ui-notify"
+            ).first.get_attribute("data-messageurl", timeout=500)
+        except Exception:
+            msg_url = None
+        if msg_url:
+            if not msg_url.startswith("http"):
+                msg_url = BASE + msg_url
+            _MSG_URL_CACHE[id(page.context)] = msg_url
     if not msg_url:
-        msg_url = "/Default/Lists/Environment/GetMessageCenterNotifications"
-    if not msg_url.startswith("http"):
-        msg_url = BASE + msg_url
+        msg_url = BASE + "/Default/Lists/Environment/GetMessageCenterNotifications"
     resp = await page.context.request.get(msg_url)
     if not resp.ok:
         return []
-    txt = await resp.text()
+    body = await resp.body()
     links: List[str] = []
     try:
-        data = json.loads(txt)
+        # json.loads nimmt Bytes direkt, kein Umweg ueber resp.text()
+        data = json.loads(body)
     except Exception:
-        data = [txt]
+        data = [body.decode("utf-8", errors="replace")]
 
     def _abs(href: str) -> str:
         return href if href.startswith("http") else BASE + href
@@ -882,12 +1634,10 @@ async def _list_messagecenter_reports(page: Page) -> List[str]:
         data = data.get("data") or data.get("items") or data.get("Messages") or []
     if isinstance(data, list):
         for m in data:
-            html = (
-                str(m.get("Message") or m.get("message") or m)
-                if isinstance(m, dict)
-                else str(m)
-            )
-            m_href = re.search(r"href=['\"]([^'\"]+)['\"]", html, re.I)
+            if isinstance(m, dict):
+                m = m.get("Message") or m.get("message") or m
+            # Meldungen sind fast immer schon str -> kein zusaetzliches str()
+            m_href = _HREF_RE.search(m if isinstance(m, str) else str(m))
             if m_href:
                 href = _abs(m_href.group(1))
                 if "/Default/Reports/Environment/Report/" in href:
@@ -896,36 +1646,59 @@ async def _list_messagecenter_reports(page: Page) -> List[str]:
 
 
 async def _pick_latest_rooms_csv(
-    click_epoch_secs: float, downloads_dir: Path
+    click_epoch_secs: float, downloads_dir: Path, stale: Optional[set] = None
 ) -> Optional[Path]:
-    if not downloads_dir.exists():
+    """Neueste CSV seit dem Export-Klick; ``stale`` merkt sich bereits als zu alt
+    erkannte Namen, damit wiederholte Aufrufe nur neue Eintraege stat()en."""
+    if stale is None:
+        stale = set()
+    # ein Durchgang: bester Treffer nach Namensmuster, sonst neueste CSV ueberhaupt
+    best_match: Optional[Tuple[float, str]] = None
+    best_any: Optional[Tuple[float, str]] = None
+    try:
+        it = os.scandir(downloads_dir)
+    except OSError:
         return None
-    candidates: List[tuple[float, Path]] = []
-    for p in downloads_dir.glob("*.csv"):
-        try:
-            mtime = os.path.getmtime(p)
-        except Exception:
-            continue
-        if mtime >= click_epoch_secs and ROOMS_CSV_PATTERN.search(p.name):
-            candidates.append((mtime, p))
-    if not candidates:
-        for p in downloads_dir.glob("*.csv"):
+    with it:
+        for entry in it:
+            if not entry.name.lower().endswith(".csv") or entry.name in stale:
+                continue
             try:
-                mtime = os.path.getmtime(p)
-            except Exception:
+                mtime = entry.stat().st_mtime
+            except OSError:
+                continue
+            if mtime < click_epoch_secs:
+                stale.add(entry.name)
                 continue
-            if mtime >= click_epoch_secs:
-                candidates.append((mtime, p))
-    if not candidates:
+            if best_any is None or mtime > best_any[0]:
+                best_any = (mtime, entry.path)
+            if ROOMS_CSV_MARKER in entry.name.lower() and (
+                best_match is None or mtime > best_match[0]
+            ):
+                best_match = (mtime, entry.path)
+    best = best_match or best_any
+    if best is None:
         return None
-    candidates.sort(reverse=True)
-    latest = candidates[0][1]
+    latest = Path(best[1])
     dest = ARTIFACTS_DIR / latest.name
-    dest.write_bytes(latest.read_bytes())
+    await asyncio.to_thread(shutil.copyfile, latest, dest)
     print(f"[EXPORT] Datei aus Downloads uebernommen: {latest} -> {dest}")
     return dest
 
 
+# alle Toast-Links in einem Roundtrip: href, Text, Sichtbarkeit
+_TOAST_LINKS_JS = """() => Array.from(
+    document.querySelectorAll('.notification-container .ui-notify-message a')
+).map(a => {
+    const r = a.getBoundingClientRect();
+    return {
+        href: a.getAttribute('href'),
+        text: (a.innerText || '').trim().toLowerCase(),
+        visible: r.width > 0 && r.height > 0 && getComputedStyle(a).visibility !== 'hidden',
+    };
+})"""
+
+
 async def click_export_and_download(
     page: Page, timeout_ms: int, downloads_dir: Path
 ) -> Optional[Path]:
@@ -937,14 +1710,13 @@ async def click_export_and_download(
             "#contentgrid i.k-i-excel",
             "button:has-text('Export')",
         ]
-        btn = None
-        for sel in sel_variants:
-            try:
-                btn = await page.wait_for_selector(sel, timeout=5000, state="visible")
-                if btn:
-                    break
-            except Exception:
-                continue
+        try:
+            # ein Wait auf die Selektor-Vereinigung statt 5 s pro Kandidat
+            btn = await page.wait_for_selector(
+                ", ".join(sel_variants), timeout=5000, state="visible"
+            )
+        except Exception:
+            btn = None
         if not btn:
             print("Kein Export-Button sichtbar - Fallback via Grid.")
             return None
@@ -953,29 +1725,31 @@ async def click_export_and_download(
         print("[EXPORT] Export-Icon geklickt - warte auf CSV-Link...")
 
         toast_href = None
-        start_ts = time.time()
+        # Fristen ueber die monotone Loop-Uhr (immun gegen NTP-Spruenge)
+        loop = asyncio.get_running_loop()
+        start_ts = loop.time()
+        deadline = start_ts + min(timeout_ms / 1000, 120)
         last_log = 0
-        while time.time() - start_ts < min(timeout_ms / 1000, 120):
-            loc = page.locator(".notification-container .ui-notify-message a")
+        # Polling mit wachsendem Abstand; Message-Center (HTTP) nur jede 4. Runde
+        delay, max_delay = 0.5, 5.0
+        polls = 0
+        while (now := loop.time()) < deadline:
             try:
-                n = await loc.count()
+                entries = await page.evaluate(_TOAST_LINKS_JS)
             except Exception:
-                n = 0
-            if n:
-                for i in range(n - 1, -1, -1):
-                    a = loc.nth(i)
-                    if await a.is_visible():
-                        text = (await a.inner_text()).strip().lower()
-                        if text.endswith(".csv"):
-                            toast_href = await a.get_attribute("href")
-                            break
-            if not toast_href:
+                entries = []
+            for entry in reversed(entries):
+                if entry["visible"] and entry["text"].endswith(".csv"):
+                    toast_href = entry["href"]
+                    break
+            if not toast_href and polls % 4 == 0:
                 links = await _list_messagecenter_reports(page)
                 if links:
                     toast_href = links[-1]
+            polls += 1
             if toast_href:
                 try:
-                    async with page.expect_download(timeout=timeout_ms) as dl_info:
+                    async with page.expect_download() as dl_info:
                         await page.evaluate(
                             "(h)=>{ const a=document.createElement('a'); a.href=h; a.target='_self'; document.body.appendChild(a); a.click(); a.remove(); }",
                             toast_href,
@@ -988,24 +1762,39 @@ async def click_export_and_download(
                 except Exception as e:
                     print(f"Download ueber Link fehlgeschlagen: {e}")
                     toast_href = None
-            waited = int(time.time() - start_ts)
+            waited = int(now - start_ts)
             if waited - last_log >= 15:
                 print(f"[EXPORT] ...warte weiterhin auf Export (ca. {waited}s)")
                 last_log = waited
-            await asyncio.sleep(0.5)
+            await asyncio.sleep(delay)
+            delay = min(delay * 1.5, max_delay)
 
         print("[EXPORT] Kein Link - pruefe Downloads-Ordner...")
-        waited = 0
+        start_ts = loop.time()
+        deadline = start_ts + timeout_ms / 1000
         last_log = 0
-        while waited < timeout_ms / 1000:
-            dest = await _pick_latest_rooms_csv(click_epoch_secs, downloads_dir)
-            if dest:
-                return dest
-            await asyncio.sleep(1)
-            waited += 1
+        delay, max_delay = 1.0, 8.0
+        # neu eingelesen wird nur, wenn sich der Ordner geaendert hat (mtime)
+        dir_stamp: Optional[int] = None
+        stale_names: set[str] = set()
+        while (now := loop.time()) < deadline:
+            try:
+                stamp = os.stat(downloads_dir).st_mtime_ns
+            except OSError:
+                stamp = None
+            if stamp is None or stamp != dir_stamp:
+                dir_stamp = stamp
+                dest = await _pick_latest_rooms_csv(
+                    click_epoch_secs, downloads_dir, stale_names
+                )
+                if dest:
+                    return dest
+            waited = int(now - start_ts)
             if waited - last_log >= 15:
                 print(f"[EXPORT] ...warte weiterhin auf Export (ca. {waited}s)")
                 last_log = waited
+            await asyncio.sleep(delay)
+            delay = min(delay * 1.5, max_delay)
         print("Keine neue CSV im Downloads-Ordner gefunden.")
         return None
     except Exception as e:
@@ -1016,67 +1805,158 @@ async def click_export_and_download(
 # ------------------ Main ------------------
 
 
-async def run(
-    timeout_ms: int,
-    calendar: str,
-    downloads_override: Optional[str],
-    split_by: str,
-    chunk: bool,
-) -> None:
-    downloads_dir = (
-        Path(downloads_override) if downloads_override else (Path.home() / "Downloads")
+async def _export_csv(
+    page: Page, timeout_ms: int, downloads_dir: Path
+) -> Optional[pd.DataFrame]:
+    dest = await click_export_and_download(page, timeout_ms, downloads_dir)
+    if not (dest and dest.suffix.lower() == ".csv"):
+        return None
+    try:
+        raw = await asyncio.to_thread(read_csv_smart, dest)
+    except Exception as e:
+        print(f"Konnte CSV nicht parsen: {e}")
+        return None
+    print(f"[CSV] Spalten: {list(raw.columns)}")
+    return raw
+
+
+# Referenzen auf Hintergrund-Tasks, sonst raeumt der GC sie vorzeitig ab
+_BG_TASKS: Set[asyncio.Task] = set()
+
+
+def _dump_page_async(html: str, name: str) -> None:
+    """Schreibt einen HTML-Dump im Thread, ohne darauf zu warten."""
+    task = asyncio.create_task(
+        asyncio.to_thread((ARTIFACTS_DIR / name).write_text, html, encoding="utf-8")
     )
+    _BG_TASKS.add(task)
+    task.add_done_callback(_BG_TASKS.discard)
+
+
+async def _scrape_grid(
+    page: Page, timeout_ms: int, debug_artifacts: bool = False, frame: Optional[Frame] = None
+) -> Optional[pd.DataFrame]:
+    if frame is None:
+        frame = await get_results_frame(page, timeout_ms)
+    if debug_artifacts:
+        _dump_page_async(await page.content(), "after_find.html")
+    df, complete = await collect_all_pages(page, timeout_ms, frame=frame)
+    if not complete:
+        # push_events loescht eigene Events, die in den Daten fehlen -> lieber gar nicht pushen
+        print(f"[GRID] Unvollstaendig ({len(df)} Zeilen) - verworfen.")
+        return None
+    return df
+
+
+def _begin_run() -> None:
+    # Fenster einmal pro Lauf festlegen: alle Schritte sehen dasselbe Datum
+    reset_window()
     start, end = compute_window_days_7()
     print(
         f"Zeitraum: {start.strftime('%d.%m.%Y %H:%M')} -> {end.strftime('%d.%m.%Y %H:%M')}"
     )
 
-    async with async_playwright() as p:
-        context = await p.chromium.launch_persistent_context(
-            user_data_dir=str(USER_DATA_DIR), headless=False, accept_downloads=True
-        )
-        page = await context.new_page()
-        await page.goto(URL_FIND, wait_until="domcontentloaded")
-        try:
-            await page.wait_for_load_state(
-                "networkidle", timeout=min(timeout_ms, 10000)
-            )
-        except PWTimeoutError:
-            pass
 
-        # Auto-Login falls noetig
-        await ensure_logged_in(page, timeout_ms)
-        try:
-            await page.wait_for_load_state("networkidle", timeout=4000)
-        except Exception:
-            pass
+async def _open_context(p, debug: bool, timeout_ms: int):
+    context = await p.chromium.launch_persistent_context(
+        user_data_dir=str(USER_DATA_DIR),
+        headless=not debug,
+        accept_downloads=True,
+        args=["--disable-gpu", "--disable-dev-shm-usage"],
+    )
+    # --timeout gilt als Vorgabe fuer alle Aktionen/Navigationen ohne eigenes Limit
+    context.set_default_timeout(timeout_ms)
+    context.set_default_navigation_timeout(timeout_ms)
+    page = await context.new_page()
+    # Schriften/Medien braucht niemand; Bilder und CSS bleiben (Export-Icon, Sichtbarkeit).
+    # Blockieren im Browser statt page.route: HTTP-Cache bleibt aktiv, kein Umweg ueber Python
+    try:
+        cdp = await context.new_cdp_session(page)
+        await cdp.send("Network.enable")
+        await cdp.send("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        print(f"[BROWSER] URL-Blockliste nicht gesetzt: {e}")
+    _FRAME_CACHE.clear()
+    page.on("framenavigated", lambda _frame: _FRAME_CACHE.clear())
+    return context, page
 
-        # Filter setzen & optional verifizieren (nicht hart abbrechen)
-        von_ok, bis_ok, searched, info = await apply_7day_filter_and_search(page)
-        print(f"[FILTER] JS: vonOk={von_ok} bisOk={bis_ok} searched={searched} {info}")
-        ok = await ensure_window_or_retry(page, timeout_ms)
 
-        # Export versuchen
-        dest = await click_export_and_download(page, timeout_ms, downloads_dir)
+async def scrape_once(
+    page: Page,
+    timeout_ms: int,
+    downloads_dir: Path,
+    prefer_grid: bool = False,
+    debug_artifacts: bool = False,
+) -> Optional[pd.DataFrame]:
+    """Ein Durchgang auf einer offenen Seite: laden, Login, Filter, Export/Grid."""
+    await page.goto(URL_FIND, wait_until="domcontentloaded")
+    # kein networkidle: Kendo haelt Verbindungen offen, das liefe immer in den Timeout
+    try:
+        await page.wait_for_selector(
+            f"{GRID_READY_SELECTOR}, #i0116, input[type='password']",
+            timeout=min(timeout_ms, 10000),
+        )
+    except PWTimeoutError:
+        pass
 
-        raw = pd.DataFrame()
-        if dest and dest.suffix.lower() == ".csv":
-            try:
-                raw = read_csv_smart(dest)
-                print(f"[CSV] Spalten: {list(raw.columns)}")
-            except Exception as e:
-                print(f"Konnte CSV nicht parsen: {e}")
-
-        # Fallback: Grid (alle Seiten)
-        if raw.empty:
-            frame = await wait_for_results_frame(page, timeout_ms)
-            (ARTIFACTS_DIR / "after_find.html").write_text(
-                await page.content(), encoding="utf-8"
-            )
-            raw = await collect_all_pages(page, timeout_ms)
+    # Auto-Login falls noetig
+    await ensure_logged_in(page, timeout_ms)
+    try:
+        await page.wait_for_selector(GRID_READY_SELECTOR, timeout=4000)
+    except Exception:
+        pass
+    await wait_for_dom_ready(page)
+
+    # Filter setzen & optional verifizieren (nicht hart abbrechen)
+    von_ok, bis_ok, searched, info = await search_and_wait(page, timeout_ms)
+    print(f"[FILTER] JS: vonOk={von_ok} bisOk={bis_ok} searched={searched} {info}")
+    # erste Suche schon richtig -> keine zweite Runde Filter setzen + Finden
+    if searched and await verify_window_matches(page, timeout_ms):
+        print("[FILTER] Zeitfenster verifiziert.")
+    else:
+        await ensure_window_or_retry(page, timeout_ms)
+
+    # Export zuerst und allein, Grid nur als Fallback: beide klicken im selben Frame, und
+    # ein abgebrochenes Grid wuerde sonst ueber den Export gewinnen. Die Frame-Suche klickt
+    # nicht und darf deshalb schon waehrend des Exports laufen.
+    prep_task = asyncio.create_task(get_results_frame(page, timeout_ms))
+
+    async def scrape_grid() -> Optional[pd.DataFrame]:
+        frame = await prep_task
+        return await _scrape_grid(page, timeout_ms, debug_artifacts, frame=frame)
+
+    sources: List[Tuple[str, Callable[[], Awaitable[Optional[pd.DataFrame]]]]] = []
+    if not prefer_grid:
+        sources.append(("Export", lambda: _export_csv(page, timeout_ms, downloads_dir)))
+    sources.append(("Grid", scrape_grid))
+    raw: Optional[pd.DataFrame] = None
+    for name, fetch in sources:
+        try:
+            res = await fetch()
+        except Exception as e:
+            print(f"[{name.upper()}] Fehler: {e}")
+            continue
+        if res is not None and not res.empty:
+            raw = res
+            print(f"[SCRAPE] Daten aus: {name}")
+            break
+    if not prep_task.done():
+        prep_task.cancel()
+    return raw
 
-        await context.close()
 
+def sync_raw(
+    raw: Optional[pd.DataFrame],
+    calendar: str,
+    split_by: str,
+    chunk: bool,
+    creds: Optional[Credentials] = None,
+) -> None:
+    """Normalisieren, HTML-Tafel schreiben und nach Google pushen.
+
+    Ohne ``creds`` werden die Zugangsdaten hier geladen; das darf dann nur im Hauptthread
+    passieren (OAuth-Flow). Der Daemon laedt sie deshalb vorher und reicht sie durch.
+    """
     if raw is None or raw.empty:
         print("[SCRAPE] Keine Daten - Abbruch ohne Google-Kalender.")
         return
@@ -1097,17 +1977,100 @@ async def run(
     except Exception:
         pass
 
-    # HTML-Tafel
-    export_html_timeline(df, ARTIFACTS_DIR / "schedule.html")
+    # HTML-Tafel im Hintergrund, waehrend OAuth/Discovery fuer Google laeuft
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        html_done = pool.submit(
+            export_html_timeline, df, ARTIFACTS_DIR / "schedule.html"
+        )
+        if creds is None:
+            creds = load_gcal_credentials()
+        svc = load_gcal_service(creds)
+        html_done.result()
 
     # Google push
-    svc = load_gcal_service()
-    group_and_push_by_calendar(svc, calendar, df, split_by)
+    group_and_push_by_calendar(svc, calendar, df, split_by, creds)
     print("Sync fertig.")
 
 
+async def run(
+    timeout_ms: int,
+    calendar: str,
+    downloads_override: Optional[str],
+    split_by: str,
+    chunk: bool,
+    prefer_grid: bool = False,
+    debug: bool = False,
+    debug_artifacts: bool = False,
+) -> None:
+    downloads_dir = (
+        Path(downloads_override) if downloads_override else (Path.home() / "Downloads")
+    )
+    _begin_run()
+    async with async_playwright() as p:
+        context, page = await _open_context(p, debug, timeout_ms)
+        raw = await scrape_once(
+            page, timeout_ms, downloads_dir, prefer_grid, debug_artifacts
+        )
+        await context.close()
+    sync_raw(raw, calendar, split_by, chunk)
+
+
+async def worker_loop(
+    timeout_ms: int,
+    calendar: str,
+    downloads_override: Optional[str],
+    split_by: str,
+    chunk: bool,
+    prefer_grid: bool = False,
+    debug: bool = False,
+    debug_artifacts: bool = False,
+    port: int = DAEMON_PORT,
+) -> None:
+    """Haelt Browser + Profil warm; jede Verbindung auf 127.0.0.1:port stoesst einen Lauf an."""
+    downloads_dir = (
+        Path(downloads_override) if downloads_override else (Path.home() / "Downloads")
+    )
+    # einmal im Hauptthread: sync_raw laeuft in einem Worker-Thread, der keinen OAuth-Flow
+    # starten darf; abgelaufene Tokens erneuert die Transport-Schicht selbst
+    creds = load_gcal_credentials()
+    jobs: asyncio.Queue = asyncio.Queue()
+
+    async def on_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await reader.readline()
+            jobs.put_nowait(None)
+            writer.write(b"queued\n")
+            await writer.drain()
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(on_client, "127.0.0.1", port)
+    print(f"[DAEMON] Warte auf Auftraege an 127.0.0.1:{port}")
+    async with server, async_playwright() as p:
+        context, page = await _open_context(p, debug, timeout_ms)
+        try:
+            jobs.put_nowait(None)  # erster Lauf sofort
+            while True:
+                await jobs.get()
+                # mehrfach angestossen waehrend ein Lauf lief -> ein Lauf genuegt
+                while not jobs.empty():
+                    jobs.get_nowait()
+                _begin_run()
+                try:
+                    raw = await scrape_once(
+                        page, timeout_ms, downloads_dir, prefer_grid, debug_artifacts
+                    )
+                    await asyncio.to_thread(sync_raw, raw, calendar, split_by, chunk, creds)
+                except Exception as e:
+                    print(f"[DAEMON] Lauf fehlgeschlagen: {e}")
+        finally:
+            await context.close()
+
+
 # ------------------ CLI ------------------
-if __name__ == "__main__":
+
+
+def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--timeout",
@@ -1130,13 +2093,54 @@ if __name__ == "__main__":
     parser.add_argument(
         "--no-chunk", action="store_true", help="Deaktiviert Tages-Splitting 06-22"
     )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Browser sichtbar starten (Standard: headless)",
+    )
+    parser.add_argument(
+        "--prefer-grid",
+        action="store_true",
+        help="Kein CSV-Export, nur Grid-Scraping",
+    )
+    parser.add_argument(
+        "--debug-artifacts",
+        action="store_true",
+        help="HTML-Dump nach der Suche schreiben (artifacts_sync/after_find.html)",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Browser warm halten und auf Auftraege warten (siehe --port)",
+    )
+    parser.add_argument(
+        "--port", type=int, default=DAEMON_PORT, help="Port fuer --daemon (localhost)"
+    )
     args = parser.parse_args()
-    asyncio.run(
-        run(
+    common = dict(
+        chunk=(not args.no_chunk),
+        prefer_grid=args.prefer_grid,
+        debug=args.debug,
+        debug_artifacts=args.debug_artifacts,
+    )
+    if args.daemon:
+        coro = worker_loop(
             args.timeout,
             args.calendar,
             args.downloads,
             args.split_by,
-            chunk=(not args.no_chunk),
+            port=args.port,
+            **common,
         )
-    )
+    else:
+        coro = run(args.timeout, args.calendar, args.downloads, args.split_by, **common)
+    try:
+        import uvloop  # optional: schnellerer Event-Loop (Linux/macOS)
+    except ImportError:
+        asyncio.run(coro)
+    else:
+        uvloop.run(coro)
+
+
+if __name__ == "__main__":
+    main()
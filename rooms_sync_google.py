@@ -7,25 +7,37 @@ Features:
 - Scannt 3 Tage (heute bis +3) in 3vrooms.
 - Delta-Sync: nur neue/gelöschte Events werden in Google Calendar angelegt/entfernt.
 - User-Änderungen an unveränderten Events bleiben erhalten.
+- Fingerprint (extendedProperties.fp) per BLAKE2b-128 + fp_algo; Events mit altem
+  SHA-1-Fingerprint werden beim ersten Lauf per Patch umgestellt statt neu angelegt.
 - CSV-Export bevorzugt, Fallback: Grid-Scrape.
 - Split in mehrere Kalender nach Standort/Gebäude möglich (--split-by).
 - Optional HTML-Zusatzansicht (--html).
 - Headless-freundlich (--headless) + SSO via Playwright --storage-state.
+- Optional inkrementelles Listing per syncToken (--sync-state DATEI). Ohne die Option wird wie
+  gehabt nur der Delete-Horizont gelistet. In GitHub Actions die Datei zwischen den Läufen
+  persistieren (z. B. actions/cache mit festem Key), sonst listet jeder Lauf den Kalender komplett.
 - Screenshots sind "best effort" (safe_screenshot), damit Headless nicht hängt.
 """
 
 import argparse
 import asyncio
+import codecs
+import functools
 import hashlib
+import html
 import json
 import logging
 import os
+import random
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, timedelta
 from pathlib import Path
 from typing import List, Tuple, Optional, Dict, Any
 
+import numpy as np
 import pandas as pd
 from dateutil import tz
 from playwright.async_api import (
@@ -35,8 +47,11 @@ from playwright.async_api import (
 from google.oauth2.credentials import Credentials
 import google.auth.exceptions
 from google.auth.transport.requests import Request
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from tqdm import tqdm
 
 
@@ -49,8 +64,11 @@ class Config:
     USER_PROFILE_DIR = "pw_profile"
     CREDENTIALS_FILE = Path("credentials.json")
     TOKEN_FILE = Path("token.json")
+    # syncToken + bekannte Events pro Kalender-ID (inkrementelles Listing); None = aus (--sync-state)
+    SYNC_STATE_FILE: Optional[Path] = None
 
     LOCAL_TIMEZONE_NAME = "Europe/Zurich"
+    DATETIME_FORMAT = "%d.%m.%Y %H:%M"
     LOCAL_TIMEZONE = tz.gettz(LOCAL_TIMEZONE_NAME)
     SYNC_WINDOW_DAYS = 3
     GCAL_DELETE_HORIZON_DAYS = 8
@@ -59,6 +77,17 @@ class Config:
     GCAL_SOURCE_TAG = "bfh-rooms-sync"
     DEFAULT_CALENDAR_NAME = "Rooms_BFH"
     GCAL_BATCH_CHUNK_SIZE = 50
+    GCAL_BATCH_WORKERS = 4  # gleichzeitige Batch-Requests, schont das Quota pro Nutzer
+    GCAL_SYNC_WORKERS = 4  # Kalender (Buckets) gleichzeitig synchronisieren
+    # 429/5xx: bis zu 5 weitere Versuche, exponentiell ab 0.5 s (max. 30 s) plus Zufallsanteil
+    GCAL_BATCH_RETRIES = 5
+    GCAL_RETRY_INITIAL_DELAY = 0.5
+    GCAL_RETRY_MAX_DELAY = 30.0
+    # Hash für extendedProperties.fp; Events ohne fp_algo stammen aus der SHA-1-Zeit
+    FINGERPRINT_ALGO = "blake2b128"
+    LEGACY_FINGERPRINT_ALGO = "sha1"
+    # darunter wird die Liste im HTML-Export als statische Tabelle gerendert (ohne jQuery/DataTables)
+    HTML_STATIC_TABLE_MAX_ROWS = 50
 
     EXPORT_BUTTON_SELECTORS = [
         "img[title='Export']",
@@ -102,6 +131,7 @@ def format_for_sidepanel(ts: pd.Timestamp) -> str:
 
 
 # ------------------ DATA NORMALIZATION ------------------
+@functools.lru_cache(maxsize=None)
 def extract_room_code(room_name: str) -> str:
     s = str(room_name or "").strip()
     if not s:
@@ -119,6 +149,43 @@ def extract_room_code(room_name: str) -> str:
     return tokens[0]
 
 
+def _iso_series(ts: pd.Series) -> pd.Series:
+    # wie Timestamp.isoformat() (Offset mit Doppelpunkt), aber für die ganze Spalte
+    return ts.dt.strftime("%Y-%m-%dT%H:%M:%S%z").str.replace(
+        r"([+-]\d{2})(\d{2})$", r"\1:\2", regex=True
+    )
+
+
+def _iso_column(df: pd.DataFrame, col: str) -> pd.Series:
+    """'start'/'end' als ISO-Strings: vorberechnete Spalte aus normalize_dataframe, sonst frisch."""
+    iso_col = f"{col}_iso"
+    return df[iso_col] if iso_col in df.columns else _iso_series(df[f"{col}_time"])
+
+
+_FINGERPRINT_HASHERS = {
+    # kein Krypto-Zweck, nur Wiedererkennung: BLAKE2b mit 16 Byte ist deutlich schneller als SHA-1
+    "blake2b128": lambda b: hashlib.blake2b(b, digest_size=16).hexdigest(),
+    "sha1": lambda b: hashlib.sha1(b).hexdigest(),
+}
+
+
+def compute_fingerprints(clean_df: pd.DataFrame, algo: str = Config.FINGERPRINT_ALGO) -> List[str]:
+    """Hash über 'start|end|room_full|location' – spaltenweise gebaut statt apply(axis=1)."""
+    if clean_df.empty:
+        return []
+    key = (
+        _iso_column(clean_df, "start")
+        + "|"
+        + _iso_column(clean_df, "end")
+        + "|"
+        + clean_df["room_full"].map(str)
+        + "|"
+        + clean_df["location"].map(str)
+    )
+    digest = _FINGERPRINT_HASHERS[algo]
+    return [digest(b) for b in key.str.encode("utf-8")]
+
+
 def normalize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return pd.DataFrame()
@@ -150,52 +217,206 @@ def normalize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
         return pd.DataFrame()
 
     def parse_datetime(series):
-        return pd.to_datetime(series, dayfirst=True, errors="coerce")
+        # 3vrooms liefert fast immer 'dd.mm.yyyy HH:MM' -> fester Format-Pfad,
+        # nur Abweichler (Sekunden, ISO, nur Datum) laufen durch die Format-Erkennung
+        parsed = pd.to_datetime(series, format=Config.DATETIME_FORMAT, errors="coerce")
+        rest = parsed.isna() & series.notna()
+        if not rest.any():
+            return parsed
+        fallback = pd.to_datetime(series[rest], dayfirst=True, errors="coerce", format="mixed")
+        if rest.all():
+            return fallback
+        if getattr(fallback.dtype, "tz", None) is None:
+            parsed[rest] = fallback
+        return parsed
+
+    def to_local(series):
+        parsed = parse_datetime(series)
+        if parsed.dt.tz is not None:
+            return parsed.dt.tz_convert(Config.LOCAL_TIMEZONE)
+        # 'infer' braucht monoton sortierte Zeiten und wirft bei gemischten Räumen ->
+        # mehrdeutige Herbststunde wird NaT (fällt unten raus), Frühlingslücke wird verschoben
+        return parsed.dt.tz_localize(Config.LOCAL_TIMEZONE, ambiguous="NaT", nonexistent="shift_forward")
 
     clean_df = pd.DataFrame(
         {
-            "start_time": parse_datetime(df[col_start]),
-            "end_time": parse_datetime(df[col_end]),
+            "start_time": to_local(df[col_start]),
+            "end_time": to_local(df[col_end]),
             "room_full": df[col_room].astype(str),
             "location": df[col_location].astype(str) if col_location else "",
         }
     )
 
-    clean_df = clean_df.dropna(subset=["start_time", "end_time"])
-    clean_df = clean_df[clean_df["end_time"] > clean_df["start_time"]].copy()
+    # Ein gemeinsamer Filter statt drei Zwischen-Frames: gültige Dauer (NaT vergleicht als False),
+    # offensichtliche Ausreisser raus, Überlappung mit dem Sync-Fenster
+    start_time, end_time = clean_df["start_time"], clean_df["end_time"]
+    duration = end_time - start_time
+    max_duration = timedelta(days=Config.SYNC_WINDOW_DAYS + 1)
+    start_win, end_win = get_sync_window()
+    mask = (
+        (end_time > start_time)
+        & (duration < max_duration)
+        & (start_time <= end_win)
+        & (end_time >= start_win)
+    )
+    clean_df = clean_df.loc[mask]
 
     if clean_df.empty:
         return clean_df
 
-    for col in ["start_time", "end_time"]:
-        clean_df[col] = clean_df[col].dt.tz_localize(Config.LOCAL_TIMEZONE, ambiguous="infer")
-
-    # Offensichtliche Ausreisser filtern
-    max_duration = timedelta(days=Config.SYNC_WINDOW_DAYS + 1)
-    clean_df = clean_df[clean_df["end_time"] - clean_df["start_time"] < max_duration]
-
-    start_win, end_win = get_sync_window()
-    clean_df = clean_df[(clean_df["start_time"] <= end_win) & (clean_df["end_time"] >= start_win)].copy()
-
-    clean_df["room_code"] = clean_df["room_full"].apply(extract_room_code)
-    clean_df["fingerprint"] = clean_df.apply(
-        lambda row: hashlib.sha1(
-            f"{row['start_time'].isoformat()}|{row['end_time'].isoformat()}|{row['room_full']}|{row['location']}".encode(
-                "utf-8"
-            )
-        ).hexdigest(),
-        axis=1,
+    # Raumnamen wiederholen sich stark -> Code nur einmal pro eindeutigem Namen bestimmen
+    room_codes = {name: extract_room_code(name) for name in clean_df["room_full"].unique()}
+    # ISO-Strings einmal formatieren; Fingerprint und Event-Bodies lesen dieselben Spalten
+    clean_df = clean_df.assign(
+        start_iso=_iso_series(clean_df["start_time"]),
+        end_iso=_iso_series(clean_df["end_time"]),
+        room_code=clean_df["room_full"].map(room_codes),
     )
+    clean_df["fingerprint"] = compute_fingerprints(clean_df)
     return clean_df.sort_values(["start_time", "room_code"]).reset_index(drop=True)
 
 
 # ------------------ GOOGLE CALENDAR API ------------------
+# Optional Mapping für hübschere Kalendernamen
+LOCATION_NAME_MAP = {
+    "BFH-H-Gebäude Schwarztor": "Schwarztorstrasse 48",
+}
+
+
+# Buckets laufen parallel und teilen sich die Zustandsdatei -> Lesen/Schreiben serialisieren
+_SYNC_STATE_LOCK = threading.Lock()
+
+
+def _load_sync_state() -> Dict[str, Any]:
+    try:
+        return json.loads(Config.SYNC_STATE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_sync_state(state: Dict[str, Any]) -> None:
+    try:
+        Config.SYNC_STATE_FILE.write_text(json.dumps(state), encoding="utf-8")
+    except OSError as e:
+        logging.warning(f"Could not write sync state: {e}")
+
+
+def _event_time(part: Optional[Dict[str, str]]) -> str:
+    part = part or {}
+    return part.get("dateTime") or part.get("date") or "1970-01-01"
+
+
+def _apply_event_changes(known: Dict[str, Dict[str, str]], items: List[Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+    """Überträgt gelistete Events auf {id: {fp, fp_algo, start, end}}; gelöschte/fremde fallen raus."""
+    for event in items:
+        props = event.get("extendedProperties", {}).get("private", {})
+        if (
+            event.get("status") == "cancelled"
+            or props.get("source") != Config.GCAL_SOURCE_TAG
+            or "fp" not in props
+        ):
+            known.pop(event["id"], None)
+            continue
+        known[event["id"]] = {
+            "fp": props["fp"],
+            "fp_algo": props.get("fp_algo", Config.LEGACY_FINGERPRINT_ALGO),
+            "start": _event_time(event.get("start")),
+            "end": _event_time(event.get("end")),
+        }
+    return known
+
+
+def _is_retryable(exc: Exception) -> bool:
+    """Quota- oder Serverfehler, bei denen ein späterer Versuch Sinn ergibt."""
+    if not isinstance(exc, HttpError):
+        return False
+    return exc.resp.status == 429 or exc.resp.status >= 500
+
+
+def _is_conflict(exc: Exception) -> bool:
+    """409/412: Konflikt mit dem Stand eines anderen Requests im selben Batch, einzeln nochmals versuchen."""
+    return isinstance(exc, HttpError) and exc.resp.status in (409, 412)
+
+
+def _retry_delay(attempt: int) -> float:
+    """Exponentielles Backoff mit Jitter, damit parallele Batches nicht gleichzeitig wiederkommen."""
+    base = Config.GCAL_RETRY_INITIAL_DELAY * 2**attempt
+    return min(Config.GCAL_RETRY_MAX_DELAY, base + random.uniform(0, 1))
+
+
+def _fingerprint_series(fingerprints: List[str], event_ids: List[str]) -> pd.Series:
+    """Event-IDs indiziert nach Fingerprint; bei doppeltem Fingerprint gewinnt (wie im Dict) der letzte."""
+    series = pd.Series(event_ids, index=pd.Index(fingerprints, dtype=object, name="fp"), dtype=object)
+    return series[~series.index.duplicated(keep="last")]
+
+
+def _as_utc(value: str) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def make_event_body(
+    start_iso: str, end_iso: str, room_code: str, room_full: str, location: str, fingerprint: str
+) -> Dict[str, Any]:
+    rc, rf, loc = room_code.strip(), room_full.strip(), location.strip()
+    summary = "Belegt" + (f" – {rc}" if rc else "") + (f" – {loc}" if loc else "")
+    if rf and loc:
+        location_str = f"{rf} | {loc}"
+    else:
+        location_str = rf or loc
+
+    return {
+        "summary": summary,
+        "location": location_str,
+        "start": {"dateTime": start_iso, "timeZone": Config.LOCAL_TIMEZONE_NAME},
+        "end": {"dateTime": end_iso, "timeZone": Config.LOCAL_TIMEZONE_NAME},
+        "visibility": "private",
+        "transparency": "opaque",
+        "extendedProperties": {
+            "private": {
+                "source": Config.GCAL_SOURCE_TAG,
+                "fp": fingerprint,
+                "fp_algo": Config.FINGERPRINT_ALGO,
+            }
+        },
+    }
+
+
+def event_bodies(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Event-Bodies für alle Zeilen: Spalten einmal als Listen holen, dann zippen (kein iterrows)."""
+    if df.empty:
+        return []
+
+    def text(col: str) -> List[str]:
+        return df[col].fillna("").astype(str).tolist() if col in df.columns else [""] * len(df)
+
+    return [
+        make_event_body(*values)
+        for values in zip(
+            _iso_column(df, "start").tolist(),
+            _iso_column(df, "end").tolist(),
+            text("room_code"),
+            text("room_full"),
+            text("location"),
+            df["fingerprint"].tolist(),
+        )
+    ]
+
+
 class GCalManager:
     def __init__(self):
-        self.service = self._get_service()
+        self.credentials = self._get_credentials()
+        self.service = build("calendar", "v3", credentials=self.credentials)
+        # httplib2 ist nicht thread-safe -> eine Verbindung pro Batch-Thread
+        self._local = threading.local()
+        # {summary: id} aus calendarList, einmal pro Lauf geladen
+        self._cal_cache: Optional[Dict[str, str]] = None
+        self._cal_lock = threading.Lock()
+        # {calendar_id: get_synced_events(...)} aus prefetch_synced_events, vom Sync verbraucht
+        self._prefetched: Dict[str, Tuple[pd.Series, pd.Series]] = {}
 
     @staticmethod
-    def _get_service():
+    def _get_credentials() -> Credentials:
         creds = None
         if Config.TOKEN_FILE.exists():
             creds = Credentials.from_authorized_user_file(str(Config.TOKEN_FILE), Config.GCAL_SCOPES)
@@ -215,103 +436,265 @@ class GCalManager:
                     " damit 'token.json' entsteht."
                 )
                 raise
-        return build("calendar", "v3", credentials=creds)
+        return creds
 
-    def get_or_create_calendar(self, calendar_name: str) -> str:
+    def _thread_http(self) -> AuthorizedHttp:
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = self._local.http = AuthorizedHttp(self.credentials, http=httplib2.Http())
+        return http
+
+    def _load_calendar_cache(self) -> Dict[str, str]:
+        """calendarList einmal komplett laden: {summary: id} (erster Treffer gewinnt)."""
+        cache: Dict[str, str] = {}
         page_token = None
         while True:
-            cal_list = self.service.calendarList().list(pageToken=page_token).execute()
+            cal_list = self.service.calendarList().list(pageToken=page_token).execute(http=self._thread_http())
             for item in cal_list.get("items", []):
-                if item["summary"] == calendar_name:
-                    logging.info(f"Found existing calendar '{calendar_name}' (ID: {item['id']})")
-                    return item["id"]
+                cache.setdefault(item["summary"], item["id"])
             page_token = cal_list.get("nextPageToken")
             if not page_token:
-                break
+                return cache
 
-        logging.info(f"Creating new calendar: '{calendar_name}'")
-        new_cal = {"summary": calendar_name, "timeZone": Config.LOCAL_TIMEZONE_NAME}
-        created_cal = self.service.calendars().insert(body=new_cal).execute()
-        return created_cal["id"]
-
-    def get_synced_events(self, calendar_id: str) -> Dict[str, str]:
-        """Liest vorhandene vom Script erstellte Events (per extendedProperties.fp) im Delete-Horizont."""
-        now_utc = pd.Timestamp.now(tz="UTC")
-        max_utc = now_utc + timedelta(days=Config.GCAL_DELETE_HORIZON_DAYS)
-
-        existing_events = {}
+    def get_or_create_calendar(self, calendar_name: str) -> str:
+        # gesperrt, damit parallele Buckets die Liste nur einmal laden
+        with self._cal_lock:
+            if self._cal_cache is None:
+                self._cal_cache = self._load_calendar_cache()
+
+            calendar_id = self._cal_cache.get(calendar_name)
+            if calendar_id:
+                logging.info(f"Found existing calendar '{calendar_name}' (ID: {calendar_id})")
+                return calendar_id
+
+            logging.info(f"Creating new calendar: '{calendar_name}'")
+            new_cal = {"summary": calendar_name, "timeZone": Config.LOCAL_TIMEZONE_NAME}
+            created_cal = self.service.calendars().insert(body=new_cal).execute(http=self._thread_http())
+            self._cal_cache[calendar_name] = created_cal["id"]
+            return created_cal["id"]
+
+    def _list_events(self, **params) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Alle Seiten von events().list; liefert (Events, nextSyncToken der letzten Seite)."""
+        items: List[Dict[str, Any]] = []
         page_token = None
         while True:
             events_result = self.service.events().list(
-                calendarId=calendar_id,
-                timeMin=now_utc.isoformat(),
-                timeMax=max_utc.isoformat(),
-                singleEvents=True,
-                maxResults=2500,
-                pageToken=page_token,
-            ).execute()
-
-            for event in events_result.get("items", []):
-                props = event.get("extendedProperties", {}).get("private", {})
-                if props.get("source") == Config.GCAL_SOURCE_TAG and "fp" in props:
-                    existing_events[props["fp"]] = event["id"]
-
+                singleEvents=True, maxResults=2500, pageToken=page_token, **params
+            ).execute(http=self._thread_http())
+            items.extend(events_result.get("items", []))
             page_token = events_result.get("nextPageToken")
             if not page_token:
-                break
+                return items, events_result.get("nextSyncToken")
+
+    def get_synced_events(self, calendar_id: str) -> Tuple[pd.Series, pd.Series]:
+        """Liest vorhandene vom Script erstellte Events (per extendedProperties.fp) im Delete-Horizont.
+
+        Ohne Zustandsdatei (Standard) wird nur der Horizont per timeMin/timeMax gelistet.
+        Mit Config.SYNC_STATE_FILE inkrementell per syncToken: nur Änderungen seit dem letzten Lauf
+        werden geholt und auf den gespeicherten Stand angewendet. Fehlt der Token oder ist er
+        abgelaufen (410), wird der Kalender einmal komplett gelistet, um einen neuen zu erhalten.
+        Vergangene Events werden vor dem Speichern verworfen, damit der Stand nicht wächst.
+        Liefert zwei Series Fingerprint -> Event-ID (aktueller Hash, alter SHA-1-Fingerprint).
+        """
+        now_utc = pd.Timestamp.now(tz="UTC")
+        max_utc = now_utc + timedelta(days=Config.GCAL_DELETE_HORIZON_DAYS)
 
-        logging.info(f"Found {len(existing_events)} existing events in calendar.")
-        return existing_events
+        if Config.SYNC_STATE_FILE is None:
+            items, _ = self._list_events(
+                calendarId=calendar_id, timeMin=now_utc.isoformat(), timeMax=max_utc.isoformat()
+            )
+            known = _apply_event_changes({}, items)
+        else:
+            with _SYNC_STATE_LOCK:
+                entry = _load_sync_state().get(calendar_id) or {}
+            items = None
+            if entry.get("token"):
+                try:
+                    items, token = self._list_events(calendarId=calendar_id, syncToken=entry["token"])
+                    known = dict(entry.get("events", {}))
+                except HttpError as e:
+                    if e.resp.status != 410:
+                        raise
+                    logging.info("Sync token expired, re-reading the full calendar.")
+            if items is None:
+                # kein timeMin/timeMax: mit Zeitfilter liesse sich der Token nicht weiterverwenden
+                items, token = self._list_events(calendarId=calendar_id, showDeleted=False)
+                known = {}
+
+            known = _apply_event_changes(known, items)
+            known = {event_id: info for event_id, info in known.items() if _as_utc(info["end"]) >= now_utc}
+            with _SYNC_STATE_LOCK:
+                # frisch laden: andere Buckets haben ihren Stand inzwischen evtl. geschrieben
+                state = _load_sync_state()
+                state[calendar_id] = {"token": token, "events": known}
+                _save_sync_state(state)
+
+        current: Tuple[List[str], List[str]] = ([], [])
+        legacy: Tuple[List[str], List[str]] = ([], [])
+        for event_id, info in known.items():
+            # gleiche Auswahl wie timeMin/timeMax: Ende nach jetzt, Beginn vor Horizont
+            if not (_as_utc(info["end"]) > now_utc and _as_utc(info["start"]) < max_utc):
+                continue
+            fps, ids = current if info["fp_algo"] == Config.FINGERPRINT_ALGO else legacy
+            fps.append(info["fp"])
+            ids.append(event_id)
+        existing_events = _fingerprint_series(*current)
+        legacy_events = _fingerprint_series(*legacy)
+
+        logging.info(
+            f"Found {len(existing_events) + len(legacy_events)} existing events in calendar "
+            f"({len(items)} fetched from API)."
+        )
+        return existing_events, legacy_events
+
+    def prefetch_synced_events(self, base_calendar_name: str, split_by: str) -> None:
+        """Liest die bestehenden Events der Zielkalender vorab (läuft parallel zum Scraping).
+
+        Nur Kalender mit gespeichertem syncToken: deren Listing ist ein billiges Delta. Ohne
+        Zustandsdatei bzw. Token wird nichts vorab gelesen, damit kein volles Listing den Sync
+        aufhält. Bis zu Config.GCAL_SYNC_WORKERS Kalender gleichzeitig.
+        Fehler sind nicht fatal: der Sync listet die Events dann selbst.
+        """
+        if Config.SYNC_STATE_FILE is None:
+            return
+        with _SYNC_STATE_LOCK:
+            state = _load_sync_state()
+        if not any(entry.get("token") for entry in state.values()):
+            return
+        try:
+            with self._cal_lock:
+                if self._cal_cache is None:
+                    self._cal_cache = self._load_calendar_cache()
+                calendars = dict(self._cal_cache)
+        except Exception as e:
+            logging.warning(f"Prefetching existing events failed, listing them during sync instead: {e}")
+            return
 
-    @staticmethod
-    def _create_event_body(row: pd.Series) -> Dict[str, Any]:
-        summary_parts = ["Belegt", row.get("room_code", "").strip()]
-        location_parts = [row.get("room_full", "").strip()]
-
-        location_val = (row.get("location") or "").strip()
-        if location_val:
-            summary_parts.append(location_val)
-            location_parts.append(location_val)
-
-        summary = " – ".join(filter(None, summary_parts))
-        location_str = " | ".join(filter(None, location_parts))
-
-        return {
-            "summary": summary,
-            "location": location_str,
-            "start": {"dateTime": row["start_time"].isoformat(), "timeZone": Config.LOCAL_TIMEZONE_NAME},
-            "end": {"dateTime": row["end_time"].isoformat(), "timeZone": Config.LOCAL_TIMEZONE_NAME},
-            "visibility": "private",
-            "transparency": "opaque",
-            "extendedProperties": {"private": {"source": Config.GCAL_SOURCE_TAG, "fp": row["fingerprint"]}},
-        }
+        prefix = f"{base_calendar_name} – "
+        calendar_ids = [
+            calendar_id
+            for name, calendar_id in calendars.items()
+            if (name == base_calendar_name if split_by == "none" else name.startswith(prefix))
+            and (state.get(calendar_id) or {}).get("token")
+        ]
+        if not calendar_ids:
+            return
+
+        def prefetch(calendar_id: str) -> None:
+            try:
+                self._prefetched[calendar_id] = self.get_synced_events(calendar_id)
+            except Exception as e:
+                logging.warning(f"Prefetching events of {calendar_id} failed, listing them during sync instead: {e}")
+
+        with ThreadPoolExecutor(min(Config.GCAL_SYNC_WORKERS, len(calendar_ids))) as pool:
+            list(pool.map(prefetch, calendar_ids))
 
     def _execute_batch(self, requests: List[Dict], progress_desc: str):
         if not requests:
             return 0, 0
 
-        success_count = 0
+        chunks = [
+            requests[i : i + Config.GCAL_BATCH_CHUNK_SIZE]
+            for i in range(0, len(requests), Config.GCAL_BATCH_CHUNK_SIZE)
+        ]
+
+        def submit(chunk) -> int:
+            ok = 0
+            pending = list(chunk)
+            conflicts: List = []
+            for attempt in range(Config.GCAL_BATCH_RETRIES + 1):
+                last_attempt = attempt == Config.GCAL_BATCH_RETRIES
+                retry: List = []
+
+                def callback(request_id, response, exception):
+                    nonlocal ok
+                    if not exception:
+                        ok += 1
+                    elif _is_retryable(exception) and not last_attempt:
+                        retry.append(pending[int(request_id)])
+                    elif _is_conflict(exception):
+                        conflicts.append(pending[int(request_id)])
+                    else:
+                        logging.warning(f"{progress_desc}: request failed: {exception}")
 
-        def callback(request_id, response, exception):
-            nonlocal success_count
-            if not exception:
-                success_count += 1
-
-        with tqdm(total=len(requests), desc=progress_desc) as pbar:
-            for i in range(0, len(requests), Config.GCAL_BATCH_CHUNK_SIZE):
-                chunk = requests[i : i + Config.GCAL_BATCH_CHUNK_SIZE]
                 batch = self.service.new_batch_http_request()
-                for req in chunk:
-                    batch.add(req, callback=callback)
-                batch.execute()
-                pbar.update(len(chunk))
-                if i + Config.GCAL_BATCH_CHUNK_SIZE < len(requests):
-                    time.sleep(1)
+                for n, req in enumerate(pending):
+                    batch.add(req, callback=callback, request_id=str(n))
+                try:
+                    batch.execute(http=self._thread_http())
+                except HttpError as e:
+                    # ganzer Batch abgelehnt (z. B. 503) -> alle Requests des Blocks erneut
+                    if not _is_retryable(e) or last_attempt:
+                        raise
+                    retry = pending
+                if not retry:
+                    break
+                delay = _retry_delay(attempt)
+                logging.warning(f"{len(retry)} request(s) rate-limited or failed server-side, retrying in {delay:.1f}s.")
+                time.sleep(delay)
+                pending = retry
+
+            # Konflikte ausserhalb des Batches einzeln wiederholen
+            for req in conflicts:
+                try:
+                    req.execute(http=self._thread_http())
+                    ok += 1
+                except HttpError as e:
+                    logging.warning(f"{progress_desc}: request failed after individual retry: {e}")
+            return ok
+
+        # mehrere Batches gleichzeitig statt nacheinander mit fester Pause dazwischen
+        success_count = 0
+        workers = min(Config.GCAL_BATCH_WORKERS, len(chunks))
+        with tqdm(total=len(requests), desc=progress_desc) as pbar, ThreadPoolExecutor(workers) as pool:
+            futures = {pool.submit(submit, chunk): len(chunk) for chunk in chunks}
+            for future in as_completed(futures):
+                success_count += future.result()
+                pbar.update(futures[future])
 
         failure_count = len(requests) - success_count
         return success_count, failure_count
 
-    def sync_events(self, base_calendar_name: str, df: pd.DataFrame, split_by: str):
+    def _migrate_legacy_events(
+        self,
+        calendar_id: str,
+        group_df: pd.DataFrame,
+        existing_events: pd.Series,
+        legacy_events: pd.Series,
+    ) -> Tuple[pd.Series, List[str]]:
+        """Stellt Events mit SHA-1-Fingerprint per Patch auf den neuen Hash um.
+
+        Noch gültige Events behalten so ID und User-Änderungen (kein Löschen + Neuanlegen).
+        Zurück kommen ``existing_events`` ergänzt um die umgestellten Events und die IDs
+        veralteter Alt-Events.
+        """
+        if legacy_events.empty:
+            return existing_events, []
+        legacy_to_new = dict(
+            zip(compute_fingerprints(group_df, Config.LEGACY_FINGERPRINT_ALGO), group_df["fingerprint"])
+        )
+        patch_requests = []
+        stale_ids = []
+        migrated: Dict[str, str] = {}
+        for old_fp, event_id in legacy_events.items():
+            new_fp = legacy_to_new.get(old_fp)
+            if new_fp is None or new_fp in existing_events.index or new_fp in migrated:
+                stale_ids.append(event_id)
+                continue
+            migrated[new_fp] = event_id
+            body = {"extendedProperties": {"private": {"fp": new_fp, "fp_algo": Config.FINGERPRINT_ALGO}}}
+            patch_requests.append(
+                self.service.events().patch(calendarId=calendar_id, eventId=event_id, body=body)
+            )
+        migrated_s, _ = self._execute_batch(patch_requests, "Migrating fingerprints")
+        logging.info(f"Fingerprint migration: {migrated_s}/{len(patch_requests)} events re-tagged.")
+        if migrated:
+            existing_events = pd.concat(
+                [existing_events, _fingerprint_series(list(migrated), list(migrated.values()))]
+            )
+        return existing_events, stale_ids
+
+    async def sync_events_async(self, base_calendar_name: str, df: pd.DataFrame, split_by: str):
         if df.empty:
             logging.warning("No events to sync.")
             return
@@ -319,60 +702,103 @@ class GCalManager:
         if split_by == "none":
             groups = {base_calendar_name: df}
         else:
-            # Optional Mapping für hübschere Kalendernamen
-            location_name_map = {
-                "BFH-H-Gebäude Schwarztor": "Schwarztorstrasse 48",
-            }
-
             def get_bucket(location: str) -> str:
                 s = (location or "").strip() or "Unbekannt"
-                if s in location_name_map:
-                    return location_name_map[s]
+                if s in LOCATION_NAME_MAP:
+                    return LOCATION_NAME_MAP[s]
                 return s.split(" - ")[0].strip() if split_by == "gebaeude" else s
 
-            df["__bucket"] = df["location"].apply(get_bucket)
+            # nur wenige Standorte -> Bucket je eindeutigem Wert, dann per map auf die Zeilen
+            bucket_map = {loc: get_bucket(loc) for loc in df["location"].unique()}
+            buckets = df["location"].map(bucket_map)
             groups = {
-                f"{base_calendar_name} – {name}": group_df.drop(columns=["__bucket"])
-                for name, group_df in df.groupby("__bucket")
+                f"{base_calendar_name} – {name}": group_df
+                for name, group_df in df.groupby(buckets, sort=False)
             }
 
-        for cal_name, group_df in groups.items():
-            logging.info(f"--- Syncing Calendar: {cal_name} ---")
-            calendar_id = self.get_or_create_calendar(cal_name)
-
-            existing_events_map = self.get_synced_events(calendar_id)
-            source_fingerprints = set(group_df["fingerprint"])
-            existing_fingerprints = set(existing_events_map.keys())
+        # Buckets sind unabhängig -> gleichzeitig, begrenzt durch Config.GCAL_SYNC_WORKERS
+        sem = asyncio.Semaphore(Config.GCAL_SYNC_WORKERS)
+        await asyncio.gather(
+            *(self._sync_one_calendar_async(cal_name, group_df, sem) for cal_name, group_df in groups.items())
+        )
+
+    async def _sync_one_calendar_async(self, cal_name: str, group_df: pd.DataFrame, sem: asyncio.Semaphore):
+        async with sem:
+            # googleapiclient blockiert -> im Thread; HTTP-Verbindungen sind pro Thread (_thread_http)
+            await asyncio.to_thread(self._sync_one_calendar, cal_name, group_df)
+
+    def _sync_one_calendar(self, cal_name: str, group_df: pd.DataFrame):
+        logging.info(f"--- Syncing Calendar: {cal_name} ---")
+        # Methoden der events()-Ressource einmal auflösen statt pro Request
+        events_resource = self.service.events()
+        insert_method, delete_method = events_resource.insert, events_resource.delete
+        calendar_id = self.get_or_create_calendar(cal_name)
+
+        prefetched = self._prefetched.pop(calendar_id, None)
+        existing_events, legacy_events = (
+            prefetched if prefetched is not None else self.get_synced_events(calendar_id)
+        )
+        existing_events, legacy_delete_ids = self._migrate_legacy_events(
+            calendar_id, group_df, existing_events, legacy_events
+        )
+        # Mengenlehre auf gehashten Index-Arrays statt auf Python-Sets
+        source_fingerprints = pd.Index(group_df["fingerprint"].unique())
+        existing_fingerprints = existing_events.index
+
+        to_create_fingerprints = source_fingerprints.difference(existing_fingerprints, sort=False)
+        to_delete_fingerprints = existing_fingerprints.difference(source_fingerprints, sort=False)
+        unchanged_count = len(source_fingerprints.intersection(existing_fingerprints))
+
+        logging.info(
+            f"Delta: create {len(to_create_fingerprints)}, delete {len(to_delete_fingerprints) + len(legacy_delete_ids)}, unchanged {unchanged_count}."
+        )
+
+        df_to_create = group_df[group_df["fingerprint"].isin(to_create_fingerprints)]
+        creation_requests = [
+            insert_method(calendarId=calendar_id, body=body)
+            for body in event_bodies(df_to_create)
+        ]
+
+        deletion_ids = existing_events.loc[to_delete_fingerprints].tolist() + legacy_delete_ids
+        deletion_requests = [
+            delete_method(calendarId=calendar_id, eventId=event_id) for event_id in deletion_ids
+        ]
+
+        created_s, created_f = self._execute_batch(creation_requests, "Creating new events")
+        deleted_s, deleted_f = self._execute_batch(deletion_requests, "Deleting old events")
+        logging.info(
+            f"Result '{cal_name}': created {created_s}/{created_s+created_f}, deleted {deleted_s}/{deleted_s+deleted_f}."
+        )
 
-            to_create_fingerprints = source_fingerprints - existing_fingerprints
-            to_delete_fingerprints = existing_fingerprints - source_fingerprints
-            unchanged_count = len(source_fingerprints & existing_fingerprints)
-
-            logging.info(
-                f"Delta: create {len(to_create_fingerprints)}, delete {len(to_delete_fingerprints)}, unchanged {unchanged_count}."
-            )
 
-            creation_requests = []
-            for _, row in group_df[group_df["fingerprint"].isin(to_create_fingerprints)].iterrows():
-                creation_requests.append(
-                    self.service.events().insert(calendarId=calendar_id, body=self._create_event_body(row))
-                )
-
-            deletion_requests = []
-            for fp in to_delete_fingerprints:
-                deletion_requests.append(
-                    self.service.events().delete(calendarId=calendar_id, eventId=existing_events_map[fp])
-                )
-
-            created_s, created_f = self._execute_batch(creation_requests, "Creating new events")
-            deleted_s, deleted_f = self._execute_batch(deletion_requests, "Deleting old events")
-            logging.info(
-                f"Result '{cal_name}': created {created_s}/{created_s+created_f}, deleted {deleted_s}/{deleted_s+deleted_f}."
-            )
+# ------------------ FILE I/O & HTML ------------------
+def _detect_encoding(path: Path) -> Optional[str]:
+    try:
+        from charset_normalizer import from_path  # optional, kommt meist mit requests
+    except ImportError:
+        return None
+    # nur die Kandidaten, die 3vrooms bzw. Excel realistisch liefern (sonst z.B. cp775 bei kurzen Dateien)
+    best = from_path(path, cp_isolation=["utf_8", "utf_16", "cp1252", "latin_1"]).best()
+    if best is None:
+        return None
+    # utf-8-sig liest auch Dateien ohne BOM, entfernt aber ein BOM vor der ersten Spalte
+    return "utf-8-sig" if codecs.lookup(best.encoding).name == "utf-8" else best.encoding
 
 
-# ------------------ FILE I/O & HTML ------------------
 def read_csv_robustly(path: Path) -> pd.DataFrame:
+    # Encoding einmal bestimmen, dann der schnelle C-Parser mit den üblichen Trennern
+    enc = _detect_encoding(path)
+    if enc:
+        for sep in [";", ","]:
+            try:
+                df = pd.read_csv(path, encoding=enc, sep=sep, engine="c")
+                if df.shape[1] > 2:
+                    logging.info(f"CSV gelesen mit encoding '{enc}' und sep '{sep}'")
+                    return df
+            except (UnicodeDecodeError, pd.errors.ParserError, LookupError):
+                continue
+
+    # Fallback: bisherige Probierschleife mit Python-Parser und Trenner-Erkennung
     encodings = ["utf-8-sig", "utf-16", "latin1", "cp1252"]
     separators = [None, ";", ","]
     for enc in encodings:
@@ -387,54 +813,108 @@ def read_csv_robustly(path: Path) -> pd.DataFrame:
     raise ValueError(f"Could not read CSV file: {path}")
 
 
-def export_html_timeline(df: pd.DataFrame, out_path: Path):
+TABLE_COLUMNS = ["start_time_str", "end_time_str", "room_code", "location", "room_full"]
+
+
+def _static_table_rows(table_df: pd.DataFrame) -> str:
+    """<tr>-Zeilen für die Liste ohne DataTables, sortiert nach Start wie dort voreingestellt."""
+    rows = []
+    for values in table_df.sort_values("start_time", kind="stable")[TABLE_COLUMNS].itertuples(index=False):
+        cells = "".join(f"<td>{'' if pd.isna(v) else html.escape(str(v))}</td>" for v in values)
+        rows.append(f"      <tr>{cells}</tr>\n")
+    return "".join(rows)
+
+
+def export_html_timeline(df: pd.DataFrame, out_path: Path, datatables: Optional[bool] = None):
+    """Schreibt Liste + Timeline als HTML.
+
+    ``datatables=None`` entscheidet nach Grösse: kleine Exporte (< Config.HTML_STATIC_TABLE_MAX_ROWS)
+    werden als statische Tabelle ohne CDN-Skripte geschrieben, grössere mit jQuery/DataTables.
+    """
     if df.empty:
         return
+    if datatables is None:
+        datatables = len(df) >= Config.HTML_STATIC_TABLE_MAX_ROWS
     df_for_table = df.copy()
     df_for_table["start_time_str"] = df_for_table["start_time"].dt.strftime("%d.%m.%Y %H:%M")
     df_for_table["end_time_str"] = df_for_table["end_time"].dt.strftime("%d.%m.%Y %H:%M")
-    table_json_data = df_for_table[
-        ["start_time_str", "end_time_str", "room_code", "location", "room_full"]
-    ].to_json(orient="records")
 
     start, end = get_sync_window()
     days = pd.date_range(start.normalize(), end.normalize(), freq="D")
     hour_min, hour_max = 6, 22
     rooms = sorted(df["room_code"].fillna(df["room_full"]).unique())
 
-    def to_percent(ts, day):
-        day_start = day.replace(hour=hour_min, minute=0, second=0)
-        day_end = day.replace(hour=hour_max, minute=0, second=0)
-        total_seconds = (day_end - day_start).total_seconds() or 1
-        ts_seconds = (ts - day_start).total_seconds()
-        return max(0, min(100, (ts_seconds / total_seconds) * 100))
-
-    timeline_html = f"""<div class="timeline-grid">
-    <div></div>{''.join(f'<div class="head">{d.strftime("%a, %d.%m.")}</div>' for d in days)}"""
-
+    # Alle Balken-Positionen in einem Schritt als (Tage x Events)-Matrix berechnen,
+    # statt pro Raum/Tag den DataFrame zu filtern und iterrows() aufzurufen.
+    local_days = days.tz_localize(None)
+    day_start_ns = days.as_unit("ns").asi8[:, None]
+    day_end_ns = (days + timedelta(days=1)).as_unit("ns").asi8[:, None]
+    span_start_ns = (local_days + timedelta(hours=hour_min)).tz_localize(Config.LOCAL_TIMEZONE).as_unit("ns").asi8[:, None]
+    span_end_ns = (local_days + timedelta(hours=hour_max)).tz_localize(Config.LOCAL_TIMEZONE).as_unit("ns").asi8[:, None]
+    span_ns = np.where(span_end_ns > span_start_ns, span_end_ns - span_start_ns, 1)
+
+    ev_start_ns = pd.DatetimeIndex(df["start_time"]).as_unit("ns").asi8[None, :]
+    ev_end_ns = pd.DatetimeIndex(df["end_time"]).as_unit("ns").asi8[None, :]
+    overlaps = (ev_start_ns < day_end_ns) & (ev_end_ns > day_start_ns)
+    left = np.clip((ev_start_ns - span_start_ns) / span_ns * 100, 0, 100)
+    right = np.clip((ev_end_ns - span_start_ns) / span_ns * 100, 0, 100)
+    width = np.maximum(0.5, right - left)
+
+    room_keys = df["room_code"].fillna(df["room_full"]).to_numpy()
+    locations = df["location"].to_numpy()
+    bars: Dict[tuple, List[str]] = {}
+    for d_idx, e_idx in zip(*np.nonzero(overlaps)):
+        bars.setdefault((room_keys[e_idx], d_idx), []).append(
+            f'<div class="bar" style="left:{left[d_idx, e_idx]:.2f}%;width:{width[d_idx, e_idx]:.2f}%" title="{locations[e_idx]}"></div>\n'
+        )
+
+    parts: List[str] = ['<div class="timeline-grid">\n    <div></div>']
+    parts.extend(f'<div class="head">{d.strftime("%a, %d.%m.")}</div>' for d in days)
     for room in rooms:
-        timeline_html += f'<div class="room">{room}</div>\n'
-        for d_ts in days:
-            timeline_html += '<div class="cell">\n'
-            day_start_loc = pd.Timestamp(d_ts).tz_localize(Config.LOCAL_TIMEZONE).normalize()
-            day_end_loc = day_start_loc + timedelta(days=1)
-            items = df[
-                (df["room_code"].fillna(df["room_full"]) == room)
-                & (df["start_time"] < day_end_loc)
-                & (df["end_time"] > day_start_loc)
-            ]
-            for _, r in items.iterrows():
-                left = to_percent(r["start_time"], day_start_loc)
-                right = to_percent(r["end_time"], day_start_loc)
-                width = max(0.5, right - left)
-                timeline_html += f'<div class="bar" style="left:{left:.2f}%;width:{width:.2f}%" title="{r["location"]}"></div>\n'
-            timeline_html += "</div>\n"
-    timeline_html += "</div>"
+        parts.append(f'<div class="room">{room}</div>\n')
+        for d_idx in range(len(days)):
+            parts.append('<div class="cell">\n')
+            parts.extend(bars.get((room, d_idx), []))
+            parts.append("</div>\n")
+    parts.append("</div>")
+    timeline_html = "".join(parts)
+
+    if datatables:
+        table_json_data = df_for_table[TABLE_COLUMNS].to_json(orient="records")
+        head_assets = '<link rel="stylesheet" href="https://cdn.datatables.net/1.13.6/css/jquery.dataTables.min.css">\n'
+        table_body = ""
+        scripts = f"""<script src="https://code.jquery.com/jquery-3.7.0.js"></script>
+<script src="https://cdn.datatables.net/1.13.6/js/jquery.dataTables.min.js"></script>
+<script>
+const reservationData = {table_json_data};
+$(document).ready(function() {{
+  $('#reservationsTable').DataTable({{
+    data: reservationData,
+    columns: [
+      {{data:'start_time_str'}},
+      {{data:'end_time_str'}},
+      {{data:'room_code'}},
+      {{data:'location'}},
+      {{data:'room_full'}}
+    ],
+    order:[[0,'asc']],
+    pageLength:25,
+    language:{{"url":"//cdn.datatables.net/plug-ins/1.13.6/i18n/de-DE.json"}}
+  }});
+}});
+</script>
+"""
+    else:
+        head_assets = (
+            "<style>#reservationsTable th{background-color:#e8eaf6}"
+            "#reservationsTable td,#reservationsTable th{padding:6px 10px;text-align:left}</style>\n"
+        )
+        table_body = f"    <tbody>\n{_static_table_rows(df_for_table)}    </tbody>\n"
+        scripts = ""
 
     html_template = f"""
 <!DOCTYPE html><html lang="de"><head><meta charset="UTF-8"><title>BFH Rooms - Interaktiver Plan</title>
-<link rel="stylesheet" href="https://cdn.datatables.net/1.13.6/css/jquery.dataTables.min.css">
-<style>
+{head_assets}<style>
 body{{font-family:system-ui,Segoe UI,Roboto,Helvetica,Arial,sans-serif;margin:2em;color:#333}}
 h1,h2{{color:#1a237e}}
 table.dataTable thead th{{background-color:#e8eaf6}}
@@ -453,30 +933,10 @@ table.dataTable thead th{{background-color:#e8eaf6}}
   <h2>Durchsuchbare Liste aller Reservationen</h2>
   <table id="reservationsTable" class="display" style="width:100%">
     <thead><tr><th>Start</th><th>Ende</th><th>Raum-Code</th><th>Standort</th><th>Raum (vollst.)</th></tr></thead>
-  </table>
+{table_body}  </table>
 </div>
 <div class="container"><h2>Visuelle Timeline ({hour_min:02d}:00 - {hour_max:02d}:00)</h2>{timeline_html}</div>
-<script src="https://code.jquery.com/jquery-3.7.0.js"></script>
-<script src="https://cdn.datatables.net/1.13.6/js/jquery.dataTables.min.js"></script>
-<script>
-const reservationData = {table_json_data};
-$(document).ready(function() {{
-  $('#reservationsTable').DataTable({{
-    data: reservationData,
-    columns: [
-      {{data:'start_time_str'}},
-      {{data:'end_time_str'}},
-      {{data:'room_code'}},
-      {{data:'location'}},
-      {{data:'room_full'}}
-    ],
-    order:[[0,'asc']],
-    pageLength:25,
-    language:{{"url":"//cdn.datatables.net/plug-ins/1.13.6/i18n/de-DE.json"}}
-  }});
-}});
-</script>
-</body></html>"""
+{scripts}</body></html>"""
     out_path.write_text(html_template, encoding="utf-8")
     logging.info(f"Interaktiver HTML-Plan exportiert nach: {out_path}")
 
@@ -491,11 +951,20 @@ async def safe_screenshot(page, path: Path, timeout_ms: int = 3000):
 
 
 class BFHScraper:
-    def __init__(self, timeout_ms: int, downloads_path: Path, headless: bool, storage_state: Optional[str] = None):
+    def __init__(
+        self,
+        timeout_ms: int,
+        downloads_path: Path,
+        headless: bool,
+        storage_state: Optional[str] = None,
+        slow_mo: Optional[int] = None,
+    ):
         self.timeout_ms = timeout_ms
         self.downloads_path = downloads_path
         self.headless = headless
         self.storage_state = storage_state
+        # Verzögerung pro Aktion nur zum Zuschauen im sichtbaren Browser; headless bremst sie nur
+        self.slow_mo = slow_mo if slow_mo is not None else (0 if headless else 50)
         self._pw = None
         self._browser = None
         self.context = None
@@ -519,7 +988,7 @@ class BFHScraper:
                 user_data_dir=Config.USER_PROFILE_DIR,
                 headless=self.headless,
                 accept_downloads=True,
-                slow_mo=50,
+                slow_mo=self.slow_mo,
             )
 
         self.context.set_default_timeout(self.timeout_ms)
@@ -576,13 +1045,16 @@ class BFHScraper:
         return True
 
     async def close_toasts(self):
-        for selector in Config.TOAST_CLOSE_SELECTORS:
-            buttons = self.page.locator(selector)
-            for i in range(await buttons.count()):
-                try:
-                    await buttons.nth(i).click(timeout=500)
-                except PWTimeoutError:
-                    pass
+        # Alle Schliessen-Buttons in einem einzigen Roundtrip anklicken
+        try:
+            closed = await self.page.evaluate(
+                "(sel) => { const els = document.querySelectorAll(sel); els.forEach(el => el.click()); return els.length; }",
+                ",".join(Config.TOAST_CLOSE_SELECTORS),
+            )
+            if closed:
+                logging.info(f"Closed {closed} notification(s).")
+        except Exception as e:
+            logging.warning(f"Could not close notifications: {e}")
 
     async def get_csv_export(self) -> Optional[Path]:
         await self.close_toasts()
@@ -595,20 +1067,15 @@ class BFHScraper:
         logging.info("Export clicked. Now polling for the download link to appear...")
 
         download_link_found = None
-        polling_end_time = time.time() + 180
-
-        while time.time() < polling_end_time:
-            try:
-                # Link aus Notification/Toast holen
-                notification_link_selector = ".ui-notify-message a, .k-notification-content a, div[role='alert'] a"
-                link_locator = self.page.locator(notification_link_selector).first
-                if await link_locator.is_visible(timeout=1000):
-                    logging.info("Download link appeared in notification!")
-                    download_link_found = link_locator
-                    break
-            except PWTimeoutError:
-                logging.info("...still waiting for link...")
-                await asyncio.sleep(5)
+        # Link aus Notification/Toast holen; Playwright wartet ereignisgesteuert statt zu pollen
+        notification_link_selector = ".ui-notify-message a, .k-notification-content a, div[role='alert'] a"
+        link_locator = self.page.locator(notification_link_selector).first
+        try:
+            await link_locator.wait_for(state="visible", timeout=180_000)
+            logging.info("Download link appeared in notification!")
+            download_link_found = link_locator
+        except PWTimeoutError:
+            pass
 
         if download_link_found:
             try:
@@ -648,15 +1115,13 @@ class BFHScraper:
 
 
 # ------------------ MAIN ------------------
-async def main(args: argparse.Namespace):
-    Config.ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
-    downloads_dir = Path(args.downloads) if args.downloads else (Path.home() / "Downloads")
-
-    start_win, end_win = get_sync_window()
-    logging.info(f"🗓️ Syncing for period: {start_win.strftime('%d.%m.%Y')} to {end_win.strftime('%d.%m.%Y')}")
-
+async def scrape_raw(
+    args: argparse.Namespace, downloads_dir: Path, start_win: pd.Timestamp, end_win: pd.Timestamp
+) -> pd.DataFrame:
     raw_df = pd.DataFrame()
-    async with BFHScraper(args.timeout, downloads_dir, args.headless, storage_state=args.storage_state) as scraper:
+    async with BFHScraper(
+        args.timeout, downloads_dir, args.headless, storage_state=args.storage_state, slow_mo=args.slow_mo
+    ) as scraper:
         await scraper.navigate_and_filter(start_win, end_win)
         csv_path = await scraper.get_csv_export()
         if csv_path:
@@ -666,6 +1131,24 @@ async def main(args: argparse.Namespace):
                 logging.error(f"{e}. Falling back to grid scraping.")
         if raw_df.empty:
             raw_df = await scraper.scrape_grid_fallback()
+    return raw_df
+
+
+async def main(args: argparse.Namespace):
+    Config.ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+    downloads_dir = Path(args.downloads) if args.downloads else (Path.home() / "Downloads")
+    if args.sync_state:
+        Config.SYNC_STATE_FILE = Path(args.sync_state)
+
+    start_win, end_win = get_sync_window()
+    logging.info(f"🗓️ Syncing for period: {start_win.strftime('%d.%m.%Y')} to {end_win.strftime('%d.%m.%Y')}")
+
+    # Token zuerst erneuern, dann Scraping und Lesen der bestehenden Events gleichzeitig
+    gcal = GCalManager()
+    raw_df, _ = await asyncio.gather(
+        scrape_raw(args, downloads_dir, start_win, end_win),
+        asyncio.to_thread(gcal.prefetch_synced_events, args.calendar, args.split_by),
+    )
 
     if raw_df.empty:
         logging.warning("Keine Daten von 3vrooms erhalten (CSV/GRID). Abbruch ohne Sync.")
@@ -683,11 +1166,10 @@ async def main(args: argparse.Namespace):
     print(df.head().to_string(index=False))
     print("--------------------")
 
-    gcal = GCalManager()
-    gcal.sync_events(args.calendar, df, args.split_by)
+    await gcal.sync_events_async(args.calendar, df, args.split_by)
 
     if args.html:
-        export_html_timeline(df, Config.ARTIFACTS_DIR / "schedule.html")
+        export_html_timeline(df, Config.ARTIFACTS_DIR / "schedule.html", datatables=args.datatables)
 
     logging.info("✅ Sync process completed successfully.")
 
@@ -700,7 +1182,13 @@ if __name__ == "__main__":
     parser.add_argument("--split-by", choices=["none", "standort", "gebaeude"], default="none",
                         help="Events in unterschiedliche Kalender splitten.")
     parser.add_argument("--html", action="store_true", help="Zusätzlich eine HTML-Timeline erzeugen.")
+    parser.add_argument("--no-datatables", dest="datatables", action="store_false", default=None,
+                        help="HTML-Liste immer statisch rendern (ohne jQuery/DataTables vom CDN).")
     parser.add_argument("--headless", action="store_true", help="Playwright headless starten.")
+    parser.add_argument("--slow-mo", dest="slow_mo", type=int, default=None,
+                        help="Verzögerung pro Playwright-Aktion in ms (Standard: 0 headless, sonst 50).")
+    parser.add_argument("--sync-state", dest="sync_state",
+                        help="JSON-Datei für inkrementelles Listing per syncToken (in CI zwischen Läufen persistieren).")
     parser.add_argument("--storage-state", dest="storage_state",
                         help="Pfad zu Playwright storage_state.json (SSO ohne Interaktion)")
 
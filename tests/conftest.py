@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# die Scripts liegen als einzelne Module im Repo-Root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
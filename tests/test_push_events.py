@@ -0,0 +1,156 @@
+"""Tests für list_own_events/push_events in rooms_push_google (Diff gegen bestehende Events)."""
+
+import pandas as pd
+import pytest
+
+import rooms_push_google as m
+
+TZ = m.LOCAL_TZ
+WINDOW = (
+    pd.Timestamp("2026-03-23 00:00:00", tz=TZ),
+    pd.Timestamp("2026-03-30 23:59:59", tz=TZ),
+)
+
+
+class _Request:
+    def __init__(self, op, params, response=None):
+        self.op = op
+        self.params = params
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class FakeEvents:
+    """Merkt sich alle list/delete/insert-Aufrufe; list liefert die vorgegebenen Seiten."""
+
+    def __init__(self, pages=()):
+        self.pages = list(pages)
+        self.list_calls = []
+
+    def list(self, **params):
+        self.list_calls.append(params)
+        return _Request("list", params, self.pages.pop(0))
+
+    def delete(self, **params):
+        return _Request("delete", params)
+
+    def insert(self, **params):
+        return _Request("insert", params)
+
+
+class FakeBatch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        for request_id, request in self.requests:
+            self.service.executed.append(request)
+            self.callback(request_id, None, None)
+
+
+class FakeService:
+    def __init__(self, pages=()):
+        self._events = FakeEvents(pages)
+        self.executed = []
+
+    def events(self):
+        return self._events
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+    def executed_params(self, op):
+        return [r.params for r in self.executed if r.op == op]
+
+
+def make_df(*rows):
+    return pd.DataFrame(
+        {
+            "Von": [pd.Timestamp(von, tz=TZ) for von, _, _ in rows],
+            "Bis": [pd.Timestamp(bis, tz=TZ) for _, bis, _ in rows],
+            "Raum": [raum for _, _, raum in rows],
+            "Standort": "Bern",
+            "Raumcode": [raum.split(" - ")[0] for _, _, raum in rows],
+        }
+    )
+
+
+@pytest.fixture(autouse=True)
+def fixed_window(monkeypatch):
+    monkeypatch.setattr(m, "compute_window_days_7", lambda: WINDOW)
+
+
+def own_event(event_id, fp):
+    return {"id": event_id, "extendedProperties": {"private": {"source": m.SOURCE_TAG, "fp": fp}}}
+
+
+def test_list_own_events_starts_at_window_and_keeps_only_own_events():
+    service = FakeService(
+        [
+            {"items": [own_event("a", "fa"), {"id": "foreign"}], "nextPageToken": "P2"},
+            {"items": [own_event("b", "fa"), own_event("c", "fc")]},
+        ]
+    )
+
+    existing = m.list_own_events(service, "cal")
+
+    assert existing == {"fa": ["a", "b"], "fc": ["c"]}
+    calls = service.events().list_calls
+    assert calls[0]["timeMin"] == WINDOW[0].tz_convert("UTC").isoformat()
+    assert calls[1]["pageToken"] == "P2"
+
+
+def test_push_events_deletes_stale_and_duplicates_and_inserts_only_missing():
+    df = make_df(
+        ("2026-03-24 08:00", "2026-03-24 10:00", "A 012 - Seminar"),
+        ("2026-03-24 12:00", "2026-03-24 14:00", "B 101 - Labor"),
+        # gleiche Buchung doppelt in den Daten -> nur ein Insert
+        ("2026-03-25 09:00", "2026-03-25 11:00", "C 201 - Aula"),
+        ("2026-03-25 09:00", "2026-03-25 11:00", "C 201 - Aula"),
+    )
+    fp_a, fp_b, fp_c, _ = m.fingerprints(df)
+    existing = {
+        fp_a: ["a1", "a2", "a3"],  # unveraendert, aber doppelt im Kalender
+        "stale": ["s1"],  # nicht mehr in den Daten
+    }
+    service = FakeService()
+
+    m.push_events(service, "cal", df, existing)
+
+    assert [p["eventId"] for p in service.executed_params("delete")] == ["a2", "a3", "s1"]
+    inserted = [p["body"] for p in service.executed_params("insert")]
+    assert [b["extendedProperties"]["private"]["fp"] for b in inserted] == [fp_b, fp_c]
+    assert inserted[0] == {
+        "summary": "Belegt - B 101 - Bern",
+        "location": "B 101 - Labor | Bern",
+        "start": {"dateTime": "2026-03-24T11:00:00Z", "timeZone": "UTC"},
+        "end": {"dateTime": "2026-03-24T13:00:00Z", "timeZone": "UTC"},
+        "visibility": "private",
+        "transparency": "opaque",
+        "extendedProperties": {"private": {"source": m.SOURCE_TAG, "fp": fp_b}},
+    }
+
+
+def test_push_events_with_unchanged_calendar_does_nothing():
+    df = make_df(("2026-03-24 08:00", "2026-03-24 10:00", "A 012"))
+    service = FakeService()
+
+    m.push_events(service, "cal", df, {m.fingerprints(df)[0]: ["a1"]})
+
+    assert service.executed == []
+
+
+def test_push_events_with_empty_data_deletes_all_own_events():
+    service = FakeService()
+
+    m.push_events(service, "cal", make_df(), {"fa": ["a1"], "fb": ["b1", "b2"]})
+
+    assert [p["eventId"] for p in service.executed_params("delete")] == ["a1", "b1", "b2"]
+    assert service.executed_params("insert") == []
@@ -0,0 +1,175 @@
+"""Tests für die vektorisierten Umformungen in rooms_push_google gegen die alten Zeilen-Schleifen."""
+
+import pandas as pd
+import pytest
+
+import rooms_push_google as m
+
+TZ = m.LOCAL_TZ
+# Fenster mit Sommerzeit-Umstellung (So 29.03.2026)
+WINDOW = (
+    pd.Timestamp("2026-03-23 00:00:00", tz=TZ),
+    pd.Timestamp("2026-03-30 23:59:59", tz=TZ),
+)
+
+
+def ts(value):
+    return pd.Timestamp(value, tz=TZ)
+
+
+def chunk_rowwise(df):
+    """Referenz: chunk_to_days_6_22 vor der Vektorisierung (iterrows + while)."""
+    if df.empty:
+        return df
+    start, end = m.compute_window_days_7()
+    rows = []
+    for _, r in df.iterrows():
+        st = max(r["Von"], start)
+        en = min(r["Bis"], end)
+        if en <= st:
+            continue
+        cur_day = pd.Timestamp(st.year, st.month, st.day, 0, 0, 0, tzinfo=TZ)
+        last_day = pd.Timestamp(en.year, en.month, en.day, 0, 0, 0, tzinfo=TZ)
+        while cur_day <= last_day:
+            d_start = pd.Timestamp(cur_day.year, cur_day.month, cur_day.day, 6, 0, 0, tzinfo=TZ)
+            d_end = pd.Timestamp(cur_day.year, cur_day.month, cur_day.day, 22, 0, 0, tzinfo=TZ)
+            s = max(st, d_start)
+            e = min(en, d_end)
+            if e > s:
+                nr = r.copy()
+                nr["Von"] = s
+                nr["Bis"] = e
+                rows.append(nr)
+            cur_day = cur_day + pd.Timedelta(days=1)
+    if not rows:
+        return df.iloc[0:0].copy()
+    out = pd.DataFrame(rows)
+    return out.sort_values(["Von", "Raum"]).reset_index(drop=True)
+
+
+def find_col_rowwise(columns, keys):
+    """Referenz: find_col aus dem alten normalize_to_room_times."""
+    lower = {str(c).lower(): c for c in columns}
+    for key in keys:
+        for lc, orig in lower.items():
+            if key in lc:
+                return orig
+    return None
+
+
+def as_rows(df):
+    return [
+        (pd.Timestamp(von).isoformat(), pd.Timestamp(bis).isoformat(), raum)
+        for von, bis, raum in zip(df["Von"], df["Bis"], df["Raum"])
+    ]
+
+
+@pytest.fixture(autouse=True)
+def fixed_window(monkeypatch):
+    monkeypatch.setattr(m, "compute_window_days_7", lambda: WINDOW)
+
+
+BOOKINGS = {
+    "same_day": [("2026-03-24 08:15", "2026-03-24 10:00", "A 012")],
+    "same_day_outside_6_22": [("2026-03-24 05:00", "2026-03-24 23:30", "B 101")],
+    "same_day_only_at_night": [("2026-03-24 22:30", "2026-03-24 23:30", "B 102")],
+    "multi_day": [("2026-03-24 14:00", "2026-03-26 11:00", "C 201")],
+    "ends_at_midnight": [("2026-03-25 20:00", "2026-03-26 00:00", "D 301")],
+    "starts_before_window": [("2026-03-20 09:00", "2026-03-23 12:00", "F 501")],
+    "ends_after_window": [("2026-03-30 18:00", "2026-04-02 10:00", "F 502")],
+    "outside_window": [
+        ("2026-03-10 08:00", "2026-03-10 10:00", "G 601"),
+        ("2026-04-05 08:00", "2026-04-07 10:00", "G 602"),
+    ],
+    "mixed": [
+        ("2026-03-26 09:00", "2026-03-26 12:00", "Z 9"),
+        ("2026-03-24 14:00", "2026-03-25 11:00", "A 1"),
+        ("2026-03-26 09:00", "2026-03-26 12:00", "A 1"),
+        ("2026-03-25 23:00", "2026-03-26 05:00", "N 1"),
+    ],
+}
+
+
+@pytest.mark.parametrize("bookings", BOOKINGS.values(), ids=BOOKINGS.keys())
+def test_chunk_to_days_matches_rowwise_reference(bookings):
+    df = pd.DataFrame(
+        {
+            "Von": pd.Series([ts(v) for v, _, _ in bookings]),
+            "Bis": pd.Series([ts(b) for _, b, _ in bookings]),
+            "Raum": [r for _, _, r in bookings],
+            "Standort": "Bern",
+        }
+    )
+
+    assert as_rows(m.chunk_to_days_6_22(df)) == as_rows(chunk_rowwise(df))
+
+
+def test_chunk_to_days_splits_multi_day_booking_into_day_slices():
+    df = pd.DataFrame(
+        {"Von": [ts("2026-03-24 14:00")], "Bis": [ts("2026-03-26 11:00")], "Raum": ["C 201"], "Standort": ""}
+    )
+
+    out = m.chunk_to_days_6_22(df)
+
+    assert as_rows(out) == [
+        (ts("2026-03-24 14:00").isoformat(), ts("2026-03-24 22:00").isoformat(), "C 201"),
+        (ts("2026-03-25 06:00").isoformat(), ts("2026-03-25 22:00").isoformat(), "C 201"),
+        (ts("2026-03-26 06:00").isoformat(), ts("2026-03-26 11:00").isoformat(), "C 201"),
+    ]
+
+
+def test_chunk_to_days_keeps_day_after_dst_change():
+    # die alte Schleife zaehlte 24h weiter (29.03. 00:00 -> 30.03. 01:00) und verlor den 30.03.
+    df = pd.DataFrame(
+        {"Von": [ts("2026-03-28 12:00")], "Bis": [ts("2026-03-30 09:00")], "Raum": ["E 401"], "Standort": ""}
+    )
+
+    out = m.chunk_to_days_6_22(df)
+
+    assert as_rows(out) == [
+        (ts("2026-03-28 12:00").isoformat(), ts("2026-03-28 22:00").isoformat(), "E 401"),
+        (ts("2026-03-29 06:00").isoformat(), ts("2026-03-29 22:00").isoformat(), "E 401"),
+        (ts("2026-03-30 06:00").isoformat(), ts("2026-03-30 09:00").isoformat(), "E 401"),
+    ]
+
+
+ROOM_NAMES = [
+    "A 012",
+    "A012 Seminarraum",
+    "Hörsaal 105",
+    "Hörsaal Nord",
+    "Aula",
+    "  B 101  ",
+    "E-003 (Labor)",
+    "Raum 204",
+    "2.15 Gruppenraum",
+    "PC-Pool",
+    "",
+    "   ",
+]
+
+
+def test_extract_room_codes_matches_rowwise_reference():
+    raum = pd.Series(ROOM_NAMES)
+
+    assert m.extract_room_codes(raum).tolist() == [m.extract_room_code(r) for r in ROOM_NAMES]
+
+
+COLUMN_SETS = [
+    ["Von", "Bis", "Ressource Bezeichnung", "Standortbezeichnung"],
+    ["Beginn", "Ende", "Raum", "Standort"],
+    ["Start", "End", "Resource", "Adresse"],
+    # "Ressource" passt auf zwei Rollen-Schluessel; der fruehere gewinnt
+    ["Ressource", "Ressourcen ID/Bezeichnung", "Von", "Bis"],
+    # Gleichstand: erste Spalte gewinnt
+    ["Raum A", "Raum B", "von", "bis"],
+    ["Datum von", "Datum bis", "Strasse", "Kommentar"],
+    ["Titel", "Beschreibung"],
+]
+
+
+@pytest.mark.parametrize("columns", COLUMN_SETS)
+def test_match_role_columns_matches_rowwise_reference(columns):
+    expected = {role: find_col_rowwise(columns, keys) for role, keys in m.ROLE_KEYS.items()}
+
+    assert m._match_role_columns(columns) == expected
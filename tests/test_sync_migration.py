@@ -0,0 +1,106 @@
+"""Tests für GCalManager._migrate_legacy_events (SHA-1-Fingerprints auf den neuen Hash umstellen)."""
+
+import pandas as pd
+
+import rooms_sync_google as m
+
+START = pd.Timestamp("2026-03-24 08:00", tz="Europe/Zurich")
+
+
+def make_group(*rooms):
+    df = pd.DataFrame(
+        {
+            "start_time": [START + pd.Timedelta(hours=2 * i) for i in range(len(rooms))],
+            "end_time": [START + pd.Timedelta(hours=2 * i + 1) for i in range(len(rooms))],
+            "room_full": list(rooms),
+            "location": "Bern",
+        }
+    )
+    df["fingerprint"] = m.compute_fingerprints(df)
+    return df
+
+
+class FakeBatch:
+    def __init__(self, executed):
+        self.executed = executed
+        self.requests = []
+
+    def add(self, request, callback, request_id=None):
+        self.requests.append((request_id, request, callback))
+
+    def execute(self, http=None):
+        for request_id, request, callback in self.requests:
+            self.executed.append(request)
+            callback(request_id, {}, None)
+
+
+def make_manager():
+    executed = []
+
+    class Events:
+        def patch(self, **params):
+            return params
+
+    service = type(
+        "Service",
+        (),
+        {"events": lambda self: Events(), "new_batch_http_request": lambda self: FakeBatch(executed)},
+    )()
+    manager = m.GCalManager.__new__(m.GCalManager)
+    manager.service = service
+    manager._thread_http = lambda: None
+    return manager, executed
+
+
+def series(mapping):
+    return m._fingerprint_series(list(mapping), list(mapping.values()))
+
+
+def test_matching_legacy_event_is_patched_not_deleted():
+    group = make_group("A 012", "B 101")
+    legacy_fps = m.compute_fingerprints(group, m.Config.LEGACY_FINGERPRINT_ALGO)
+    manager, executed = make_manager()
+
+    existing, stale = manager._migrate_legacy_events(
+        "cal", group, series({}), series({legacy_fps[0]: "ev-a"})
+    )
+
+    assert stale == []
+    assert executed == [
+        {
+            "calendarId": "cal",
+            "eventId": "ev-a",
+            "body": {
+                "extendedProperties": {
+                    "private": {"fp": group["fingerprint"][0], "fp_algo": m.Config.FINGERPRINT_ALGO}
+                }
+            },
+        }
+    ]
+    assert existing.to_dict() == {group["fingerprint"][0]: "ev-a"}
+
+
+def test_legacy_event_without_current_row_is_stale():
+    group = make_group("A 012")
+    manager, executed = make_manager()
+
+    existing, stale = manager._migrate_legacy_events("cal", group, series({}), series({"gone": "ev-old"}))
+
+    assert stale == ["ev-old"]
+    assert executed == []
+    assert existing.empty
+
+
+def test_legacy_event_is_stale_when_new_fingerprint_already_exists():
+    group = make_group("A 012", "B 101")
+    legacy_fps = m.compute_fingerprints(group, m.Config.LEGACY_FINGERPRINT_ALGO)
+    manager, executed = make_manager()
+    current = series({group["fingerprint"][0]: "ev-new"})
+
+    existing, stale = manager._migrate_legacy_events(
+        "cal", group, current, series({legacy_fps[0]: "ev-a", legacy_fps[1]: "ev-b"})
+    )
+
+    assert stale == ["ev-a"]
+    assert [req["eventId"] for req in executed] == ["ev-b"]
+    assert existing.to_dict() == {group["fingerprint"][0]: "ev-new", group["fingerprint"][1]: "ev-b"}
@@ -0,0 +1,154 @@
+"""Tests für GCalManager.get_synced_events (Horizont-Listing, syncToken, 410, cancelled)."""
+
+import json
+
+import pandas as pd
+import pytest
+from googleapiclient.errors import HttpError
+
+import rooms_sync_google as m
+
+NOW = pd.Timestamp.now(tz="UTC")
+
+
+def make_event(event_id, fp, days=1, status="confirmed"):
+    start = NOW + pd.Timedelta(days=days)
+    return {
+        "id": event_id,
+        "status": status,
+        "start": {"dateTime": start.isoformat()},
+        "end": {"dateTime": (start + pd.Timedelta(hours=1)).isoformat()},
+        "extendedProperties": {
+            "private": {"source": m.Config.GCAL_SOURCE_TAG, "fp": fp, "fp_algo": m.Config.FINGERPRINT_ALGO}
+        },
+    }
+
+
+class _Response:
+    status = 410
+    reason = "Gone"
+
+
+class FakeEvents:
+    """events().list(...).execute() liefert der Reihe nach die vorgegebenen Antworten."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def list(self, **params):
+        self.calls.append(params)
+        response = self.responses.pop(0)
+
+        class _Request:
+            def execute(self, http=None):
+                if isinstance(response, Exception):
+                    raise response
+                return response
+
+        return _Request()
+
+
+def make_manager(responses):
+    events = FakeEvents(responses)
+    service = type("Service", (), {"events": lambda self: events})()
+    manager = m.GCalManager.__new__(m.GCalManager)
+    manager.service = service
+    manager._thread_http = lambda: None
+    return manager, events
+
+
+@pytest.fixture
+def state_file(tmp_path, monkeypatch):
+    path = tmp_path / "state.json"
+    monkeypatch.setattr(m.Config, "SYNC_STATE_FILE", path)
+    return path
+
+
+def test_without_state_file_lists_only_the_horizon(monkeypatch, tmp_path):
+    monkeypatch.setattr(m.Config, "SYNC_STATE_FILE", None)
+    monkeypatch.chdir(tmp_path)
+    manager, events = make_manager([{"items": [make_event("a", "fa")], "nextSyncToken": "T"}])
+
+    existing, legacy = manager.get_synced_events("cal")
+
+    assert existing.to_dict() == {"fa": "a"}
+    assert legacy.empty
+    assert "timeMin" in events.calls[0] and "timeMax" in events.calls[0]
+    assert "syncToken" not in events.calls[0]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_first_run_lists_full_calendar_and_prunes_past_events(state_file):
+    manager, events = make_manager(
+        [{"items": [make_event("a", "fa"), make_event("old", "fo", days=-3)], "nextSyncToken": "T1"}]
+    )
+
+    existing, _ = manager.get_synced_events("cal")
+
+    assert existing.to_dict() == {"fa": "a"}
+    assert "timeMin" not in events.calls[0]
+    state = json.loads(state_file.read_text())
+    assert state["cal"]["token"] == "T1"
+    assert set(state["cal"]["events"]) == {"a"}
+
+
+def test_sync_token_applies_changes_and_drops_cancelled_events(state_file):
+    manager, events = make_manager(
+        [
+            {"items": [make_event("a", "fa"), make_event("b", "fb")], "nextSyncToken": "T1"},
+            {"items": [{"id": "a", "status": "cancelled"}, make_event("c", "fc")], "nextSyncToken": "T2"},
+        ]
+    )
+    manager.get_synced_events("cal")
+
+    existing, _ = manager.get_synced_events("cal")
+
+    assert existing.to_dict() == {"fb": "b", "fc": "c"}
+    assert events.calls[1]["syncToken"] == "T1"
+    state = json.loads(state_file.read_text())
+    assert state["cal"]["token"] == "T2"
+    assert set(state["cal"]["events"]) == {"b", "c"}
+
+
+def test_expired_sync_token_falls_back_to_full_listing(state_file):
+    state_file.write_text(
+        json.dumps({"cal": {"token": "OLD", "events": {"stale": {"fp": "fs", "fp_algo": "blake2b128",
+                                                               "start": NOW.isoformat(),
+                                                               "end": (NOW + pd.Timedelta(days=1)).isoformat()}}}})
+    )
+    manager, events = make_manager(
+        [HttpError(_Response(), b"gone"), {"items": [make_event("e", "fe")], "nextSyncToken": "T3"}]
+    )
+
+    existing, _ = manager.get_synced_events("cal")
+
+    assert existing.to_dict() == {"fe": "e"}
+    assert events.calls[0]["syncToken"] == "OLD"
+    assert "syncToken" not in events.calls[1]
+    state = json.loads(state_file.read_text())
+    assert state["cal"] == {"token": "T3", "events": {"e": state["cal"]["events"]["e"]}}
+
+
+def test_prefetch_skips_calendars_without_sync_token(state_file):
+    state_file.write_text(json.dumps({"with-token": {"token": "T1", "events": {}}}))
+    manager, events = make_manager([{"items": [make_event("a", "fa")], "nextSyncToken": "T2"}])
+    manager._cal_lock = m.threading.Lock()
+    manager._cal_cache = {"Rooms – Bern": "with-token", "Rooms – Biel": "no-token", "Other": "x"}
+    manager._prefetched = {}
+
+    manager.prefetch_synced_events("Rooms", "standort")
+
+    assert list(manager._prefetched) == ["with-token"]
+    assert [call["calendarId"] for call in events.calls] == ["with-token"]
+
+
+def test_prefetch_does_nothing_without_state_file(monkeypatch):
+    monkeypatch.setattr(m.Config, "SYNC_STATE_FILE", None)
+    manager, events = make_manager([])
+    manager._prefetched = {}
+
+    manager.prefetch_synced_events("Rooms", "none")
+
+    assert manager._prefetched == {}
+    assert events.calls == []